@@ -0,0 +1,85 @@
+"""
+Compare the pandas pipeline with the DuckDB backend and check they agree.
+
+    python benchmarks/bench_backends.py [--sizes 100000 1000000 5000000] [--threads N]
+
+For each pillar size the synthetic file set from run_bench.py is loaded and
+cleaned once, then reconciled with ``recon.run_stages`` (the reference) and
+``duckdb_backend.run_duckdb``. The two India Conso frames must be equal
+value for value (the key columns are categorical in pandas and plain
+strings from DuckDB, so only dtypes may differ); the script exits with
+status 1 on any mismatch.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd  # noqa: E402
+
+from duckdb_backend import available, run_duckdb  # noqa: E402
+from recon import load_clean_inputs, run_stages  # noqa: E402
+from run_bench import ensure_data  # noqa: E402
+
+
+def load_frames(paths):
+    handles = {role: open(path, "rb") for role, path in paths.items()}
+    try:
+        return load_clean_inputs(handles["dump"], handles["pillar"], handles["owner_map"], handles["attendance"])
+    finally:
+        for fh in handles.values():
+            fh.close()
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    pivot, _ = func(*args, **kwargs)
+    return pivot, time.perf_counter() - start
+
+
+def parity_error(reference, candidate):
+    """None if the two pivots agree, else the assertion message."""
+    try:
+        pd.testing.assert_frame_equal(
+            reference, candidate, check_exact=True, check_dtype=False, check_categorical=False,
+        )
+    except AssertionError as e:
+        return str(e)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--threads", type=int, help="DuckDB threads (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "hours_recon_bench"))
+    args = parser.parse_args(argv)
+
+    if not available():
+        parser.error("duckdb is not installed (pip install duckdb)")
+
+    failures = 0
+    print(f"{'rows':>10} {'pandas':>9} {'duckdb':>9} {'speedup':>8}  parity")
+    for rows in args.sizes:
+        frames = load_frames(ensure_data(args.data_dir, rows, "csv", args.seed))
+        reference, pandas_s = timed(run_stages, frames)
+        candidate, duckdb_s = timed(run_duckdb, frames, threads=args.threads)
+        error = parity_error(reference, candidate)
+        failures += error is not None
+        print(
+            f"{rows:>10} {pandas_s:>8.2f}s {duckdb_s:>8.2f}s {pandas_s / duckdb_s:>7.2f}x  "
+            + ("ok" if error is None else "MISMATCH")
+        )
+        if error:
+            print(error, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
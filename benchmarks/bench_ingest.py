@@ -0,0 +1,76 @@
+"""
+Compare the fast ingestion engines in ingest.py with the original pandas path,
+and time the validation sample read, which should not grow with the file.
+
+    python benchmarks/bench_ingest.py [--sizes 100000 1000000 5000000] [--formats csv xlsx]
+
+Synthetic pillar files (see synth.py) are written to a temporary directory (kept with
+--keep). xlsx files are limited to Excel's 1,048,576 rows, so larger sizes
+are only benchmarked as CSV.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from ingest import read_file_with_engine, read_sample  # noqa: E402
+from recon import PILLAR_COLS  # noqa: E402
+from synth import EXCEL_MAX_ROWS, make_inputs, write_input  # noqa: E402
+from validation import VALIDATION_SAMPLE_ROWS  # noqa: E402
+
+
+def time_read(path, fast):
+    with open(path, "rb") as f:
+        start = time.perf_counter()
+        df, engine = read_file_with_engine(f, header=2, usecols=PILLAR_COLS, fast=fast)
+        return time.perf_counter() - start, engine, len(df)
+
+
+def time_sample(path):
+    with open(path, "rb") as f:
+        start = time.perf_counter()
+        read_sample(f, header=2, rows=VALIDATION_SAMPLE_ROWS)
+        return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--formats", nargs="+", default=["csv", "xlsx"], choices=["csv", "xlsx"])
+    parser.add_argument("--keep", action="store_true", help="keep the generated files")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="hours_recon_bench_")
+    print(f"{'rows':>10} {'fmt':>5} {'baseline':>14} {'fast':>22} {'speedup':>8} {'sample':>8}")
+    try:
+        for rows in args.sizes:
+            df = make_inputs(rows)["pillar"]
+            for fmt in args.formats:
+                if fmt == "xlsx" and rows > EXCEL_MAX_ROWS:
+                    print(f"{rows:>10} {fmt:>5}  skipped: over Excel's row limit")
+                    continue
+                path = os.path.join(workdir, f"pillar_{rows}.{fmt}")
+                write_input(df, path)
+
+                base_s, base_engine, _ = time_read(path, fast=False)
+                fast_s, fast_engine, _ = time_read(path, fast=True)
+                sample_s = time_sample(path)
+                print(
+                    f"{rows:>10} {fmt:>5} {base_s:>8.2f}s {base_engine:<5}"
+                    f"{fast_s:>8.2f}s {fast_engine:<13}{base_s / fast_s:>7.1f}x {sample_s:>7.2f}s"
+                )
+    finally:
+        if args.keep:
+            print(f"Files kept in {workdir}")
+        else:
+            shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+End-to-end benchmark of the reconciliation pipeline on synthetic data.
+
+    python benchmarks/run_bench.py [--sizes 10000 100000 1000000 5000000]
+                                   [--format csv] [--compare OLD.json]
+
+For each pillar size a file set is generated with synth.py (kept in
+--data-dir so later runs reuse it), then every file read, pipeline stage
+and the Excel write are timed with profiling.Profiler. Results are saved
+to benchmarks/results/<timestamp>_<git sha>.json; --compare prints the
+per-stage speedup against an earlier results file.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from profiling import Profiler  # noqa: E402
+from recon import load_clean_inputs, run_stages  # noqa: E402
+from report import write_report  # noqa: E402
+from synth import EXCEL_MAX_ROWS, FILE_NAMES, generate  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCH_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def ensure_data(data_dir, rows, fmt, seed):
+    folder = os.path.join(data_dir, f"{fmt}_{rows}_{seed}")
+    marker = os.path.join(folder, ".complete")
+    if not os.path.exists(marker):
+        generate(folder, rows, fmt, seed)
+        open(marker, "w").close()
+    return {role: os.path.join(folder, f"{name}.{fmt}") for role, name in FILE_NAMES.items()}
+
+
+def bench_size(paths, write_excel=True):
+    """Run the pipeline once and return the profiler records plus the total time."""
+    profiler = Profiler()
+    handles = {role: open(path, "rb") for role, path in paths.items()}
+    start = time.perf_counter()
+    try:
+        frames = load_clean_inputs(
+            handles["dump"], handles["pillar"], handles["owner_map"], handles["attendance"],
+            profiler=profiler,
+        )
+    finally:
+        for fh in handles.values():
+            fh.close()
+
+    pivot, _ = run_stages(frames, profiler=profiler)
+
+    if write_excel and len(pivot) <= EXCEL_MAX_ROWS:
+        with tempfile.TemporaryDirectory() as tmp:
+            with profiler.stage("write_excel", rows_in=pivot) as record:
+                write_report(pivot, os.path.join(tmp, "out.xlsx"))
+                record["rows_out"] = len(pivot)
+
+    return profiler.records, time.perf_counter() - start
+
+
+def print_table(rows, seconds_total, records, baseline=None):
+    print(f"\n=== {rows:,} pillar rows: {seconds_total:.2f}s end to end ===")
+    print(f"{'stage':<20}{'seconds':>10}{'peak MB':>10}{'rows in':>12}{'rows out':>12}{'vs base':>10}")
+    for r in records:
+        ratio = ""
+        if baseline and r["stage"] in baseline and r["seconds"]:
+            ratio = f"{baseline[r['stage']] / r['seconds']:.2f}x"
+        print(
+            f"{r['stage']:<20}{r['seconds']:>10.3f}{(r['peak_rss_delta_mb'] or 0):>10.1f}"
+            f"{str(r['rows_in'] or ''):>12}{str(r['rows_out'] or ''):>12}{ratio:>10}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hours Recon pipeline benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "hours_recon_bench"))
+    parser.add_argument("--no-excel", action="store_true", help="skip the Excel write stage")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--output", help="results JSON path (default: benchmarks/results/...)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            for run in json.load(f)["runs"]:
+                baseline[run["rows"]] = {r["stage"]: r["seconds"] for r in run["stages"]}
+                baseline[run["rows"]]["total"] = run["total_seconds"]
+
+    runs = []
+    for rows in args.sizes:
+        if args.format == "xlsx" and rows > EXCEL_MAX_ROWS:
+            print(f"\nSkipping {rows:,} rows: too many for xlsx")
+            continue
+        paths = ensure_data(args.data_dir, rows, args.format, args.seed)
+        records, total = bench_size(paths, write_excel=not args.no_excel)
+        print_table(rows, total, records, baseline.get(rows))
+        if rows in baseline:
+            print(f"{'total':<20}{total:>10.3f}{'':>34}{baseline[rows]['total'] / total:>9.2f}x")
+        runs.append({"rows": rows, "format": args.format, "total_seconds": total, "stages": records})
+
+    results = {
+        "revision": git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "runs": runs,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{results['revision']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
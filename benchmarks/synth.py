@@ -0,0 +1,184 @@
+"""
+Synthetic dump, pillar, owner-mapping and attendance files for benchmarking.
+
+The files follow the layout main.py expects from the real exports:
+
+- dump, pillar and attendance have two preamble rows before the header
+  (read with ``header=2``); the owner mapping has its header on row 1
+- Order No carries spaces ("GS 0042 100337"), SO Line No is written as a
+  float string ("3.0"), Customer Code as a number
+- Location codes come from the HUB/Zone reference table (plus a few unmapped ones)
+- attendance is a pivot with "Row Labels" = "<Order No>-<SO Line>" and one
+  column per billing-period date range ("01 Mar - 31 Mar", "26 Feb - 25 Mar")
+
+    python benchmarks/synth.py OUT_DIR --rows 100000 [--format csv|xlsx]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recon import DUMP_COLS, PILLAR_COLS, hub_zone_table  # noqa: E402
+
+EXCEL_MAX_ROWS = 1_048_576 - 3
+FILE_NAMES = {"dump": "dump", "pillar": "pillar", "owner_map": "owner_mapping", "attendance": "attendance"}
+
+UNMAPPED_LOCATIONS = ["ZZZGRD", "TMPGRD"]
+MONTH_START = pd.Timestamp("2024-03-01")
+
+# (Period From offset, Period To offset) in days from MONTH_START.
+BILLING_CYCLES = [(0, 30), (-4, 24), (0, 14), (15, 30), (0, 6), (7, 13)]
+CYCLE_WEIGHTS = [0.7, 0.1, 0.05, 0.05, 0.05, 0.05]
+
+
+def _choice_str(rng, values, size):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+
+def make_orders(n_orders, rng):
+    """Order numbers as they appear in the exports, spaces included."""
+    branch = rng.integers(1, 9999, n_orders)
+    serial = np.arange(n_orders) + 100_000
+    return pd.Series(
+        "GS " + pd.Series(branch).astype(str).str.zfill(4) + " " + pd.Series(serial).astype(str)
+    ).to_numpy(dtype=object)
+
+
+def make_inputs(rows, seed=0):
+    """Return ``{role: DataFrame}`` for a pillar of ``rows`` rows and matching lookups."""
+    rng = np.random.default_rng(seed)
+
+    n_orders = max(rows // 4, 1)
+    orders = make_orders(n_orders, rng)
+    locations = list(hub_zone_table().frame["Location"]) + UNMAPPED_LOCATIONS
+    order_location = _choice_str(rng, locations, n_orders)
+    order_customer = rng.integers(1000, 1000 + max(n_orders // 3, 10), n_orders)
+    order_customer[rng.random(n_orders) < 0.01] = 7401
+
+    # ---------- pillar ----------
+    order_idx = rng.integers(0, n_orders, rows)
+    so_line = rng.integers(1, 6, rows)
+    deployment = rng.choice([8.0, 12.0, 24.0], rows)
+    performed = np.round(deployment * rng.integers(0, 32, rows), 2)
+    billed = np.where(rng.random(rows) < 0.8, performed, np.round(performed + rng.choice([-8, 8, -12, 12, 24], rows), 2))
+    billed = np.clip(billed, 0, None)
+    contracted = deployment * 30
+
+    pillar = pd.DataFrame({
+        "Location": order_location[order_idx],
+        "Customer Code": order_customer[order_idx],
+        "Customer Name": "Customer " + pd.Series(order_customer[order_idx]).astype(str).to_numpy(dtype=object),
+        "Order No": orders[order_idx],
+        "Invoice No": rng.integers(10_000_000, 99_999_999, rows),
+        "SO Line No": so_line.astype(float),
+        "No of Post": rng.integers(1, 4, rows),
+        "Deployment Hrs": deployment,
+        "WF_TaskID": rng.integers(1, 4, rows),
+        "Performed Hrs": performed,
+        "Billed Hrs": billed,
+        "Billed Vs Performed": billed - performed,
+        "Contracted Vs Performed": contracted - performed,
+        "Billing Pattern": _choice_str(rng, ["Monthly", "Cycle", "Fixed"], rows),
+        "ERP Cont Hrs": contracted,
+        "Saturn Cont Hrs": contracted,
+        "Scheduled Hrs": performed,
+        "Site Name": "Site",
+    })
+    # Some exports pad codes with stray spaces / lower case.
+    messy = rng.random(rows) < 0.02
+    pillar.loc[messy, "Location"] = " " + pillar.loc[messy, "Location"].str.lower() + " "
+
+    # ---------- dump: 1-3 invoices per order ----------
+    invoices_per_order = rng.integers(1, 4, n_orders)
+    dump_order = np.repeat(np.arange(n_orders), invoices_per_order)
+    n_dump = len(dump_order)
+    cycle = rng.choice(len(BILLING_CYCLES), n_dump, p=CYCLE_WEIGHTS)
+    month_shift = rng.integers(-2, 1, n_dump) * 30
+    period_from = MONTH_START + pd.to_timedelta(np.array([BILLING_CYCLES[c][0] for c in cycle]) + month_shift, "D")
+    period_to = MONTH_START + pd.to_timedelta(np.array([BILLING_CYCLES[c][1] for c in cycle]) + month_shift, "D")
+    invoice_dt = period_to + pd.to_timedelta(rng.integers(1, 10, n_dump), "D")
+
+    dump = pd.DataFrame({
+        "Order No": orders[dump_order],
+        "Period From": period_from.strftime("%d-%b-%Y"),
+        "Period To": period_to.strftime("%d-%b-%Y"),
+        "Invoice dt": invoice_dt.strftime("%d-%b-%Y"),
+        "Invoice Amount": np.round(rng.random(n_dump) * 100_000, 2),
+    })
+    dump.loc[rng.random(n_dump) < 0.01, "Invoice dt"] = ""
+    dump = dump.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+    # ---------- attendance: one row per (order, SO line) ----------
+    pairs = pd.DataFrame({"order": order_idx, "line": so_line}).drop_duplicates()
+    date_ranges = sorted({
+        ((MONTH_START + pd.Timedelta(days=a + s)).strftime("%d %b"), (MONTH_START + pd.Timedelta(days=b + s)).strftime("%d %b"))
+        for a, b in BILLING_CYCLES for s in (-60, -30, 0)
+    })
+    attendance = pd.DataFrame({
+        "Row Labels": pd.Series(orders[pairs["order"].to_numpy()]) + "-" + pairs["line"].astype(str).to_numpy()
+    })
+    for start, end in date_ranges:
+        values = rng.integers(0, 31, len(pairs)).astype(float) * 8
+        values[rng.random(len(pairs)) < 0.3] = np.nan
+        attendance[f"{start} - {end}"] = values
+    attendance["Grand Total"] = attendance.iloc[:, 1:].sum(axis=1)
+
+    # ---------- owner mapping ----------
+    owner_pairs = pd.DataFrame({"loc": order_location, "cust": order_customer}).drop_duplicates()
+    owner_pairs = owner_pairs.sample(frac=0.9, random_state=seed)
+    owner_map = pd.DataFrame({
+        "Billing Location": owner_pairs["loc"].to_numpy(),
+        "Cust No": owner_pairs["cust"].astype(float).to_numpy(),
+        "Branch Finance Lead": _choice_str(rng, [f"Lead {i:02d}" for i in range(40)], len(owner_pairs)),
+        "Region": "India",
+    })
+
+    assert set(DUMP_COLS) <= set(dump.columns) and set(PILLAR_COLS) <= set(pillar.columns)
+    return {"dump": dump, "pillar": pillar, "owner_map": owner_map, "attendance": attendance}
+
+
+def write_input(df, path, preamble=True):
+    """Write one input file; with ``preamble`` two title rows precede the header."""
+    if path.endswith(".csv"):
+        with open(path, "w", encoding="latin1", newline="") as f:
+            if preamble:
+                f.write("Synthetic export\nGenerated for benchmarking\n")
+            df.to_csv(f, index=False)
+    else:
+        with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+            df.to_excel(writer, sheet_name="Sheet1", index=False, startrow=2 if preamble else 0)
+            if preamble:
+                writer.sheets["Sheet1"].write(0, 0, "Synthetic export")
+
+
+def generate(out_dir, rows, fmt="csv", seed=0):
+    """Write a full file set to ``out_dir`` and return ``{role: path}``."""
+    if fmt == "xlsx" and rows > EXCEL_MAX_ROWS:
+        raise ValueError(f"{rows} rows do not fit in an xlsx sheet; use csv")
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {}
+    for role, df in make_inputs(rows, seed).items():
+        path = os.path.join(out_dir, f"{FILE_NAMES[role]}.{fmt}")
+        write_input(df, path, preamble=role != "owner_map")
+        paths[role] = path
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Hours Recon input files")
+    parser.add_argument("out_dir")
+    parser.add_argument("--rows", type=int, default=100_000, help="pillar rows (default: 100000)")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for role, path in generate(args.out_dir, args.rows, args.format, args.seed).items():
+        print(f"{role:>10}: {path}")
+
+
+if __name__ == "__main__":
+    main()
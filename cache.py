@@ -0,0 +1,213 @@
+"""
+Content-addressed cache of parsed and cleaned input frames.
+
+Frames are keyed on a hash of the uploaded file's bytes plus the arguments
+used to parse it, so a rerun (or a re-upload of an identical file) skips
+parsing entirely. The same cache class memoizes pipeline stage results,
+keyed on the stage name and its inputs' keys. There are two tiers:
+
+- an in-memory LRU bounded by the frames' total memory usage
+- an optional on-disk tier of Parquet files, used when pyarrow is installed
+
+Cached frames are shared between runs and must be treated as read-only.
+The caches are shared by concurrent background jobs (jobs.py), so their
+bookkeeping is guarded by a lock.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+# Bump whenever the cleaning logic in recon.py changes so stale entries
+# written by an older version are not reused.
+CACHE_VERSION = "3"
+
+DEFAULT_MAX_MEMORY_BYTES = 1024 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 4 * 1024 * 1024 * 1024
+DEFAULT_DISK_DIR = os.environ.get(
+    "HOURS_RECON_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "hours_recon"),
+)
+
+
+def file_digest(file):
+    """Hash the full content of a binary file-like object, leaving it rewound."""
+    h = hashlib.blake2b(digest_size=20)
+    file.seek(0)
+    for chunk in iter(lambda: file.read(1024 * 1024), b""):
+        h.update(chunk)
+    file.seek(0)
+    return h.hexdigest()
+
+
+def cache_key(digest, **params):
+    """Combine a content digest (or stage name) with parameters into a cache key."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(CACHE_VERSION.encode())
+    h.update(digest.encode())
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class FrameCache:
+    """Two-tier (memory LRU + Parquet on disk) cache of DataFrames."""
+
+    def __init__(self, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES, disk_dir=DEFAULT_DISK_DIR,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir if disk_dir and _parquet_available() else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    # ---------- memory tier ----------
+    def _remember(self, key, df):
+        size = frame_nbytes(df)
+        if size > self.max_memory_bytes:
+            return
+        if key in self._entries:
+            self._memory_bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (df, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted
+
+    # ---------- disk tier ----------
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.parquet")
+
+    def _load_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        import pandas as pd
+        try:
+            df = pd.read_parquet(path)
+        except Exception:
+            return None
+        os.utime(path)
+        return df
+
+    def _store_disk(self, key, df):
+        if not self.disk_dir:
+            return
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = self._disk_path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp, index=True)
+            os.replace(tmp, path)
+        except Exception:
+            # Mixed-type object columns or non-string column names cannot be
+            # stored as Parquet; such frames are only kept in memory.
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".parquet"):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:  # pruned by another job meanwhile
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    # ---------- public API ----------
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits["memory"] += 1
+                return self._entries[key][0]
+        df = self._load_disk(key)
+        if df is not None:
+            with self._lock:
+                self.hits["disk"] += 1
+                self._remember(key, df)
+        return df
+
+    def put(self, key, df):
+        with self._lock:
+            self._remember(key, df)
+        self._store_disk(key, df)
+
+    def get_or_parse(self, key, parse):
+        """
+        Return the frame cached under ``key``.
+
+        ``parse`` is called (with no arguments) only on a miss and its result
+        is stored under ``key``, normally built with ``cache_key`` from the
+        file's content hash and its parse parameters. ``parse`` runs outside
+        the lock, so concurrent misses on the same key may both parse.
+        """
+        df = self.get(key)
+        if df is None:
+            with self._lock:
+                self.misses += 1
+            df = parse()
+            self.put(key, df)
+        return df
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+
+    @property
+    def memory_bytes(self):
+        return self._memory_bytes
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_default_cache = None
+_default_stage_memo = None
+_defaults_lock = threading.Lock()
+
+
+def default_cache():
+    """Process-wide cache shared by every Streamlit session and rerun."""
+    global _default_cache
+    with _defaults_lock:
+        if _default_cache is None:
+            _default_cache = FrameCache()
+        return _default_cache
+
+
+def default_stage_memo():
+    """Process-wide, memory-only memo of pipeline stage results."""
+    global _default_stage_memo
+    with _defaults_lock:
+        if _default_stage_memo is None:
+            _default_stage_memo = FrameCache(disk_dir=None)
+        return _default_stage_memo
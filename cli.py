@@ -0,0 +1,227 @@
+"""
+Command-line entry point for running the reconciliation without Streamlit.
+
+    python cli.py INPUT_DIR -o OUTPUT_DIR [--workers N] [--profile] [--chunk-rows N]
+                  [--backend pandas|duckdb] [--formats xlsx zip parquet csv]
+                  [--history [DIR]]
+
+INPUT_DIR holds one sub-directory per month (e.g. ``2024-03/``), each with
+the four input files. Files are recognised by name: it must contain
+"dump", "pillar", "owner" or "attendance" (case-insensitive) and end in
+.csv or .xlsx. If INPUT_DIR itself contains the four files it is processed
+as a single month. Files directly in INPUT_DIR are shared by every month
+sub-directory that lacks its own, e.g. one dump exported over several
+months. A shared dump is resolved per month: for a month labelled as a
+period ("2024-03"), each Order No gets its latest invoice billed up to
+that month, not the latest in the whole dump (see ``recon.dump_as_of``).
+With --profile, per-stage timings are written next to each workbook as
+profile.json. With --chunk-rows the pillar file is streamed in batches of
+that many rows (see ``recon.reconcile_chunked``), for pillar files too
+large to load at once. --backend duckdb runs the joins and the pivot sums
+in DuckDB (see duckdb_backend.py); pandas is the default and the
+reference. --formats picks the outputs written per month (default: the
+xlsx workbook); see ``report.OUTPUT_FORMATS``. --history also saves each
+month's pivot under its label in the history store (see history.py),
+replacing an earlier save of the same month. Each month's files are
+validated first (see validation.py); a month with problems is reported and
+skipped before anything is parsed.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from duckdb_backend import available as duckdb_available
+from history import DEFAULT_HISTORY_DIR, save_period
+from profiling import Profiler
+from recon import (
+    PERIOD_MONTH, dump_as_of, hub_zone_table, iter_pillar_chunks, load_clean_inputs, reconcile, reconcile_chunked,
+)
+from report import OUTPUT_FORMATS, write_outputs
+from validation import ValidationError, validate_inputs
+
+
+FILE_ROLES = ["dump", "pillar", "owner", "attendance"]
+BACKENDS = ["pandas", "duckdb"]
+
+
+def find_files(folder):
+    """Return {role: path} for the input files found in ``folder``."""
+    found = {}
+    for name in sorted(os.listdir(folder)):
+        lower = name.lower()
+        if not lower.endswith((".csv", ".xlsx")) or lower.startswith("~$"):
+            continue
+        for role in FILE_ROLES:
+            if role in lower and role not in found:
+                found[role] = os.path.join(folder, name)
+                break
+    return found
+
+
+def find_file_set(folder, shared=None):
+    """
+    Return {role: path} for the input files in ``folder``, taking the roles
+    it lacks from ``shared``, or None if incomplete.
+    """
+    found = dict(shared or {}, **find_files(folder))
+    if len(found) < len(FILE_ROLES):
+        return None
+    return found
+
+
+def discover_months(input_dir):
+    """Return a sorted list of (month_label, file_set) found under ``input_dir``."""
+    own = find_file_set(input_dir)
+    if own:
+        return [(os.path.basename(os.path.normpath(input_dir)), own)]
+
+    shared = find_files(input_dir)
+    months = []
+    for name in sorted(os.listdir(input_dir)):
+        folder = os.path.join(input_dir, name)
+        if not os.path.isdir(folder):
+            continue
+        file_set = find_file_set(folder, shared)
+        if file_set:
+            months.append((name, file_set))
+        else:
+            print(f"Skipping {folder}: could not find all of {', '.join(FILE_ROLES)}", file=sys.stderr)
+    return months
+
+
+def shared_dump_period(label, file_set, input_dir):
+    """
+    The period to resolve a month's dump as of: its label, if the label is a
+    period and the dump is not in the month's own folder under ``input_dir``
+    but shared by the month folders.
+    """
+    month_dir = os.path.join(input_dir, label)
+    shared = os.path.isdir(month_dir) and os.path.dirname(file_set["dump"]) != month_dir
+    return label if shared and PERIOD_MONTH.fullmatch(label) else None
+
+
+def run_month(label, file_set, output_dir, profile=False, chunk_rows=None, backend="pandas", formats=("xlsx",),
+              history_dir=None, period=None):
+    """
+    Reconcile one month's file set and write its outputs. Returns the output paths.
+
+    With ``period`` ("2024-03") only the dump's invoices billed up to that
+    period are used, for a dump shared by several months.
+    """
+    profiler = Profiler()
+
+    def log(msg):
+        print(f"[{label}] {msg}", flush=True)
+
+    handles = {role: open(path, "rb") for role, path in file_set.items()}
+    try:
+        with profiler.stage("validate"):
+            validation = validate_inputs(handles["dump"], handles["pillar"], handles["owner"], handles["attendance"])
+        for issue in validation.warnings:
+            log("warning: " + validation.summary([issue]))
+        if not validation.ok:
+            raise ValidationError(validation)
+
+        frames = load_clean_inputs(
+            handles["dump"], None if chunk_rows else handles["pillar"], handles["owner"], handles["attendance"],
+            profiler=profiler,
+        )
+        if period:
+            frames = dict(frames, dump=dump_as_of(frames["dump"], period))
+            log(f"using the {len(frames['dump'])} invoices of the shared dump billed up to {period}")
+        if chunk_rows:
+            # The pillar handle has to stay open while its chunks are read.
+            india_conso = reconcile_chunked(
+                frames["dump"], iter_pillar_chunks(handles["pillar"], chunk_rows),
+                frames["owner_map"], frames["attendance"],
+                log=log, cleaned=True, profiler=profiler,
+            )
+        elif backend == "duckdb":
+            from duckdb_backend import run_duckdb
+            india_conso, _ = run_duckdb(frames, log=log, profiler=profiler)
+        else:
+            india_conso = reconcile(
+                frames["dump"], frames["pillar"], frames["owner_map"], frames["attendance"],
+                log=log, cleaned=True, profiler=profiler,
+            )
+    finally:
+        for fh in handles.values():
+            fh.close()
+
+    out_dir = os.path.join(output_dir, label)
+    paths = write_outputs(india_conso, formats, out_dir, profiler=profiler)
+
+    if history_dir:
+        with profiler.stage("history", rows_in=india_conso) as record:
+            save_period(india_conso, label, history_dir)
+            record["rows_out"] = len(india_conso)
+
+    if profile:
+        with open(os.path.join(out_dir, "profile.json"), "w") as f:
+            f.write(profiler.to_json(month=label, hub_zone_version=hub_zone_table().version))
+    return list(paths.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hours Recon batch runner")
+    parser.add_argument("input_dir", help="directory of monthly file sets")
+    parser.add_argument("-o", "--output-dir", default="output", help="where workbooks are written (default: output)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="number of months processed in parallel (default: 1)")
+    parser.add_argument("--profile", action="store_true", help="write per-stage timings to profile.json next to each workbook")
+    parser.add_argument("--chunk-rows", type=int, help="stream the pillar file in batches of N rows to bound memory")
+    parser.add_argument("--backend", choices=BACKENDS, default="pandas", help="engine for the joins and pivot (default: pandas)")
+    parser.add_argument("--formats", nargs="+", choices=list(OUTPUT_FORMATS), default=["xlsx"], help="outputs to write (default: xlsx)")
+    parser.add_argument("--history", nargs="?", const=DEFAULT_HISTORY_DIR, metavar="DIR",
+                        help=f"save each month's pivot to the history store (default DIR: {DEFAULT_HISTORY_DIR})")
+    args = parser.parse_args(argv)
+
+    if args.backend == "duckdb":
+        if args.chunk_rows:
+            parser.error("--chunk-rows only works with the pandas backend")
+        if not duckdb_available():
+            parser.error("the duckdb backend needs `pip install duckdb`")
+
+    months = discover_months(args.input_dir)
+    if not months:
+        parser.error(f"no complete file sets found in {args.input_dir}")
+
+    periods = {label: shared_dump_period(label, file_set, args.input_dir) for label, file_set in months}
+    failures = 0
+    start = time.perf_counter()
+
+    if args.workers > 1 and len(months) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = {
+                pool.submit(
+                    run_month, label, file_set, args.output_dir, args.profile, args.chunk_rows, args.backend, args.formats,
+                    args.history, periods[label],
+                ): label
+                for label, file_set in months
+            }
+            for future in as_completed(futures):
+                label = futures[future]
+                try:
+                    print(f"[{label}] wrote {', '.join(future.result())}")
+                except Exception as e:
+                    failures += 1
+                    print(f"[{label}] failed: {e}", file=sys.stderr)
+    else:
+        for label, file_set in months:
+            try:
+                paths = run_month(
+                    label, file_set, args.output_dir, args.profile, args.chunk_rows, args.backend, args.formats,
+                    args.history, periods[label],
+                )
+                print(f"[{label}] wrote {', '.join(paths)}")
+            except Exception as e:
+                failures += 1
+                print(f"[{label}] failed: {e}", file=sys.stderr)
+
+    print(f"Processed {len(months) - failures}/{len(months)} months in {time.perf_counter() - start:.1f}s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Optional DuckDB execution backend for the join-and-pivot core.
+
+``run_duckdb`` takes the same cleaned frames as ``recon.run_stages`` and
+expresses dump_first, the invoice-period, attendance, HUB/Zone and owner
+joins and the PIVOT_KEYS sums as a single SQL query. DuckDB plans it as a
+whole and runs the hash joins and the aggregation on all cores. The pandas
+pipeline in recon.py stays the reference; the India Conso layout and the
+inter-assignment adjustment are still applied with pandas on the
+(small) aggregated result.
+
+Requires ``pip install duckdb``; ``available()`` tells whether it is.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from ingest import _module_available
+from profiling import Profiler
+from recon import (
+    DATE_RANGE_COL, PIVOT_KEYS, PIVOT_SUMS,
+    apply_adjustments, hub_zone_table, pivot_layout,
+)
+
+
+def available():
+    return _module_available("duckdb")
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _varchar(alias, col):
+    return f"CAST({alias}.{_quote(col)} AS VARCHAR)"
+
+
+def _attendance_table(attendance):
+    """
+    The date-range columns of ``attendance`` under positional names.
+
+    Normalized date ranges can repeat and DuckDB needs unique column names,
+    so the columns are renamed c0, c1, ... and returned with a frame mapping
+    each of them back to its Date_Range.
+    """
+    positions = [
+        i for i, c in enumerate(attendance.columns)
+        if isinstance(c, str) and c != "row_key" and DATE_RANGE_COL.fullmatch(c)
+    ]
+    values = attendance.iloc[:, positions]
+
+    # clean_attendance already made them numeric; anything else is ignored.
+    names = [f"c{i}" for i in range(len(positions))]
+    table = pd.DataFrame(
+        {name: pd.to_numeric(values.iloc[:, i], errors="coerce").astype("float64") for i, name in enumerate(names)},
+        index=attendance.index,
+    )
+    table["row_key"] = attendance["row_key"]
+    column_map = pd.DataFrame({"col": names, "Date_Range": list(values.columns)})
+    return table, column_map
+
+
+def pivot_sums_sql(attendance_columns):
+    """The query producing ``recon.sum_by_pivot_keys`` output from the registered tables."""
+    # Missing keys join like a pandas merge: NULL matches NULL.
+    keys = ", ".join(_quote(k) for k in PIVOT_KEYS)
+    order = ", ".join(f"{_quote(k)} NULLS LAST" for k in PIVOT_KEYS)
+    if attendance_columns:
+        # UNPIVOT is the melt of the wide attendance pivot; NaN becomes NULL
+        # so it is skipped by the sums as in pandas.
+        melted = f"""
+        SELECT a.row_key, m.Date_Range, NULLIF(a.value, 'NaN'::DOUBLE) AS attendance
+        FROM attendance UNPIVOT INCLUDE NULLS (value FOR col IN ({", ".join(attendance_columns)})) a
+        JOIN column_map m ON a.col = m.col
+        """
+    else:
+        melted = "SELECT NULL::VARCHAR AS row_key, NULL::VARCHAR AS Date_Range, NULL::DOUBLE AS attendance WHERE false"
+
+    return f"""
+    WITH dump_first AS (
+        SELECT
+            {_varchar("dump", "Order No")} AS order_no,
+            "Period From", "Period To",
+            CAST(day("Period From") AS VARCHAR) || '-' || CAST(day("Period To") AS VARCHAR) AS Date_Range
+        FROM dump
+        QUALIFY row_number() OVER (
+            PARTITION BY {_varchar("dump", "Order No")}
+            ORDER BY "Invoice dt" DESC NULLS LAST, "Period To" DESC NULLS LAST,
+                     "Period From" DESC NULLS LAST, row_no
+        ) = 1
+    ),
+    melted AS ({melted}),
+    enriched AS (
+        SELECT
+            h.HUB,
+            {_varchar("p", "Location")} AS "Location",
+            h.Zone,
+            o.branch_finance_lead AS "Owner",
+            {_varchar("p", "Customer Code")} AS "Customer Code",
+            p."Customer Name",
+            {_varchar("p", "Order No")} AS "Order No",
+            p."Invoice No",
+            p."WF_TaskID",
+            d."Period From",
+            d."Period To",
+            m.attendance AS "Total Attendance",
+            p."Performed Hrs",
+            p."Billed Hrs"
+        FROM pillar p
+        LEFT JOIN dump_first d
+            ON {_varchar("p", "Order No")} IS NOT DISTINCT FROM d.order_no
+        LEFT JOIN melted m
+            ON trim({_varchar("p", "Order No")}) || trim({_varchar("p", "SO Line No")}) IS NOT DISTINCT FROM m.row_key
+            AND d.Date_Range IS NOT DISTINCT FROM m.Date_Range
+        LEFT JOIN hub_zone h
+            ON {_varchar("p", "Location")} IS NOT DISTINCT FROM h."Location"
+        LEFT JOIN owner_map o
+            ON {_varchar("p", "Location")} || '_' || {_varchar("p", "Customer Code")} IS NOT DISTINCT FROM o."Key"
+    )
+    SELECT
+        {keys},
+        coalesce(fsum("Total Attendance"), 0) AS "Total Attendance",
+        coalesce(fsum("Performed Hrs"), 0) AS "Performed Hrs",
+        coalesce(fsum("Billed Hrs"), 0) AS "Billed Hrs"
+    FROM enriched
+    GROUP BY ALL
+    ORDER BY {order}
+    """
+
+
+def sum_by_pivot_keys_duckdb(frames, threads=None):
+    """Equivalent of enriching ``frames["pillar"]`` and ``recon.sum_by_pivot_keys``, in DuckDB."""
+    import duckdb
+
+    dump = frames["dump"][["Order No", "Period From", "Period To", "Invoice dt"]]
+    dump = dump.assign(row_no=np.arange(len(dump)))
+    hub_zone = hub_zone_table().frame[["Location", "HUB", "Zone"]]
+    attendance, column_map = _attendance_table(frames["attendance"])
+
+    tables = {
+        "dump": dump,
+        "pillar": frames["pillar"],
+        "attendance": attendance,
+        "column_map": column_map,
+        "hub_zone": hub_zone,
+        "owner_map": frames["owner_map"][["Key", "branch_finance_lead"]],
+    }
+
+    con = duckdb.connect()
+    try:
+        if threads:
+            con.execute(f"SET threads = {int(threads)}")
+        # Arrow tables scan faster than DataFrames (categoricals become
+        # dictionary arrays, strings are shared).
+        for name, df in tables.items():
+            con.register(name, pa.Table.from_pandas(df, preserve_index=False))
+        sums = con.execute(pivot_sums_sql(list(column_map["col"]))).fetch_arrow_table().to_pandas()
+    finally:
+        con.close()
+    return sums[PIVOT_KEYS + PIVOT_SUMS]
+
+
+def run_duckdb(frames, log=None, profiler=None, threads=None):
+    """
+    DuckDB counterpart of ``recon.run_stages``; returns ``(pivot, records)``.
+
+    The joins and sums run as one "duckdb_query" stage; "pivot" and
+    "adjustments" are the pandas stages applied to its result.
+    """
+    log = log or (lambda msg: None)
+    profiler = profiler or Profiler()
+
+    log("Joining and aggregating with DuckDB...")
+    with profiler.stage("duckdb_query", rows_in=frames["pillar"]) as record:
+        sums = sum_by_pivot_keys_duckdb(frames, threads=threads)
+        record["rows_out"] = sums
+
+    log("Creating pivot...")
+    with profiler.stage("pivot", rows_in=sums) as record:
+        pivot = pivot_layout(sums)
+        record["rows_out"] = pivot
+
+    with profiler.stage("adjustments", rows_in=pivot) as record:
+        pivot = apply_adjustments(pivot)
+        record["rows_out"] = pivot
+    return pivot, profiler.records
@@ -0,0 +1,278 @@
+"""
+Drill-down queries over a reconciled India Conso pivot.
+
+``PivotExplorer`` is built once per run and answers the slices finance
+leads ask for (variance by Zone, by Owner, by Customer, one Order across
+its Invoices) without re-pivoting the whole frame:
+
+- every dimension is held as integer codes into its sorted distinct values
+- Order No and Owner have an index: the row positions for each value,
+  sorted by code, so filtering on them touches only the matching rows
+- roll-ups along HIERARCHY (HUB -> Location -> Zone -> Customer -> Order)
+  and per single dimension are computed up front, each from the smallest
+  finer roll-up; a query filtered only on its own group-by columns is a
+  filter of one of them
+- any other roll-up is summed with ``np.bincount`` over the filtered rows
+
+``rows`` returns one page of the filtered, sorted rows and the total, so
+only a page is materialized and sent to the browser. The first sort on a
+column keeps that column's order over the whole pivot; a filtered sort
+then picks its rows out of it.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+HIERARCHY = ["HUB", "Location", "Zone", "Customer Code", "Order No", "Invoice No"]
+DIMENSIONS = ["HUB", "Location", "Zone", "Owner", "Customer Code", "Customer Name", "Order No", "Invoice No"]
+INDEXED = ["Order No", "Owner"]
+MEASURES = [
+    "Total Attendance", "Total Performed", "Total Billed",
+    "Var. Performed Vs. Billed", "Inter assignment adjustment",
+]
+
+# Group-bys computed up front, finest first: each HIERARCHY prefix down to
+# Order No (the Invoice level is the rows) and the single dimensions.
+PRECOMPUTED = (
+    [tuple(HIERARCHY[:n]) for n in range(len(HIERARCHY) - 1, 0, -1)]
+    + [(d,) for d in ["Location", "Zone", "Owner", "Customer Code"]]
+)
+
+PAGE_SIZE = 50
+SORT_CACHE_ENTRIES = 8
+
+# Filtered sorts over more than this share of the rows reuse the column's
+# whole-pivot order instead of sorting the subset.
+GLOBAL_ORDER_SHARE = 0.125
+
+# Key spaces up to this many times the row count are summed densely.
+DENSE_GROUPS_FACTOR = 4
+
+
+def page(frame, number, page_size=PAGE_SIZE):
+    """Rows of page ``number`` (0-based) of ``frame`` and the total row count."""
+    start = number * page_size
+    return frame.iloc[start:start + page_size], len(frame)
+
+
+def _sorted_codes(values):
+    """Codes into the sorted distinct values of ``values`` (missing: after the last) and those values."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, categories = values.cat.codes.to_numpy(dtype=np.int64), values.cat.categories
+        used = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(categories)))
+        if len(used) < len(categories):
+            remap = np.full(len(categories), -1, dtype=np.int64)
+            remap[used] = np.arange(len(used))
+            codes = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+            categories = categories.take(used)
+    else:
+        codes, categories = pd.factorize(values)
+    try:
+        order = np.argsort(categories, kind="stable")
+    except TypeError:
+        order = np.arange(len(categories))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    if len(categories):
+        codes = np.where(codes >= 0, rank[np.maximum(codes, 0)], len(categories))
+    else:
+        codes = np.zeros(len(codes), dtype=np.int64)  # all missing
+    return codes, pd.Index(categories).take(order)
+
+
+def _group(codes, radices):
+    """
+    Group id per row for the combination of ``codes`` (in key order) and the
+    row of each group's first occurrence. Groups are numbered in key order.
+    """
+    n = len(codes[0]) if codes else 0
+    combined = np.zeros(n, dtype=np.int64)
+    bound = 1
+    for c, radix in zip(codes, radices):
+        if bound * radix >= 2 ** 62:
+            combined, uniques = pd.factorize(combined, sort=True)
+            bound = len(uniques)
+        combined = combined * radix + c
+        bound *= radix
+
+    if bound <= DENSE_GROUPS_FACTOR * max(n, 1):
+        present = np.bincount(combined, minlength=bound) > 0
+        group = (np.cumsum(present) - 1)[combined]
+        n_groups = int(present.sum())
+    else:
+        group, uniques = pd.factorize(combined, sort=True)
+        n_groups = len(uniques)
+
+    first = np.empty(n_groups, dtype=np.int64)
+    first[group[::-1]] = np.arange(n - 1, -1, -1)
+    return group, first
+
+
+class PivotExplorer:
+    """Indexes and roll-ups over one pivot; treat it as read-only."""
+
+    def __init__(self, india_conso):
+        self.frame = india_conso.reset_index(drop=True)
+        self._codes = {}
+        self._categories = {}
+        for dim in DIMENSIONS:
+            self._codes[dim], self._categories[dim] = _sorted_codes(self.frame[dim])
+        self._measures = {
+            m: np.nan_to_num(
+                pd.to_numeric(self.frame[m], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            )
+            for m in MEASURES
+        }
+
+        self._index = {}
+        for dim in INDEXED:
+            order = np.argsort(self._codes[dim], kind="stable")
+            bounds = np.searchsorted(self._codes[dim][order], np.arange(len(self._categories[dim]) + 2))
+            self._index[dim] = (order, bounds)
+
+        # by -> (codes per dimension, measure sums and "Rows" per group)
+        self._rollups = {}
+        rows = (self._codes, dict(self._measures, Rows=np.ones(len(self))))
+        for by in PRECOMPUTED:
+            sources = [r for key, r in self._rollups.items() if set(by) <= set(key)]
+            source = min(sources, key=lambda r: len(r[1]["Rows"]), default=rows)
+            self._rollups[by] = self._sum(source, by)
+        self._rollup_frames = {by: self._frame(r, by) for by, r in self._rollups.items()}
+
+        self._orders = {}
+        self._sorted = OrderedDict()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def values(self, dim):
+        """The distinct values of ``dim``, sorted (for filter pickers)."""
+        return list(self._categories[dim])
+
+    # ---------- aggregation ----------
+    def _sum(self, source, by, positions=None):
+        codes, sums = source
+        if positions is not None:
+            codes = {dim: codes[dim][positions] for dim in by}
+            sums = {k: v[positions] for k, v in sums.items()}
+        group, first = _group([codes[dim] for dim in by], [len(self._categories[dim]) + 1 for dim in by])
+        return (
+            {dim: codes[dim][first] for dim in by},
+            {k: np.bincount(group, weights=v, minlength=len(first)) for k, v in sums.items()},
+        )
+
+    def _frame(self, rollup, by):
+        codes, sums = rollup
+        frame = pd.DataFrame({
+            dim: pd.Categorical.from_codes(
+                np.where(codes[dim] < len(self._categories[dim]), codes[dim], -1),
+                categories=self._categories[dim],
+            )
+            for dim in by
+        })
+        for k, v in sums.items():
+            frame[k] = v.astype(np.int64) if k == "Rows" else v
+        return frame
+
+    # ---------- filtering ----------
+    def _wanted_codes(self, dim, wanted):
+        wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+        categories = self._categories[dim]
+        codes = [len(categories) if pd.isna(v) else categories.get_indexer([v])[0] for v in wanted]
+        return np.array([c for c in codes if c >= 0], dtype=np.int64)
+
+    def _positions(self, filters):
+        """Sorted row positions matching ``filters`` ({dim: value or list}), or None for all rows."""
+        if not filters:
+            return None
+        wanted = {dim: self._wanted_codes(dim, v) for dim, v in filters.items()}
+
+        positions = None
+        for dim in [d for d in INDEXED if d in wanted]:
+            order, bounds = self._index[dim]
+            found = np.concatenate(
+                [order[bounds[c]:bounds[c + 1]] for c in wanted[dim]] or [np.empty(0, dtype=np.intp)]
+            )
+            positions = found if positions is None else np.intersect1d(positions, found)
+        if positions is not None:
+            positions = np.sort(positions)
+
+        for dim in [d for d in wanted if d not in INDEXED]:
+            codes = self._codes[dim] if positions is None else self._codes[dim][positions]
+            mask = np.isin(codes, wanted[dim])
+            positions = np.flatnonzero(mask) if positions is None else positions[mask]
+        return positions
+
+    def rollup(self, by, filters=None):
+        """
+        MEASURES summed per ``by`` (a dimension or list of them) over the
+        rows matching ``filters``, with a "Rows" count, ordered by ``by``.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        filters = filters or {}
+        precomputed = self._rollups.get(tuple(by))
+        if precomputed is not None and set(filters) <= set(by):
+            frame = self._rollup_frames[tuple(by)]
+            if not filters:
+                return frame.copy()
+            keep = np.ones(len(frame), dtype=bool)
+            for dim, wanted in filters.items():
+                keep &= np.isin(precomputed[0][dim], self._wanted_codes(dim, wanted))
+            return frame[keep].reset_index(drop=True)
+
+        positions = self._positions(filters)
+        rows = (self._codes, dict(self._measures, Rows=np.ones(len(self))))
+        return self._frame(self._sum(rows, by, positions), by)
+
+    # ---------- rows ----------
+    def _sort_key(self, column, ascending):
+        if column in self._codes:
+            codes, n = self._codes[column], len(self._categories[column])
+            # Missing values (code n) last either way.
+            return codes if ascending else np.where(codes < n, n - 1 - codes, n)
+        values = self._measures[column]
+        return values if ascending else -values
+
+    def _order(self, column, ascending):
+        """Stable order of all rows by ``column``, computed on first use."""
+        key = (column, ascending)
+        if key not in self._orders:
+            self._orders[key] = np.argsort(self._sort_key(column, ascending), kind="stable")
+        return self._orders[key]
+
+    def _sorted_positions(self, filters, sort_by, ascending):
+        key = (repr(sorted((filters or {}).items(), key=lambda kv: kv[0])), sort_by, ascending)
+        cached = self._sorted.get(key)
+        if cached is not None:
+            self._sorted.move_to_end(key)
+            return cached
+
+        positions = self._positions(filters)
+        if sort_by is None:
+            positions = np.arange(len(self)) if positions is None else positions
+        elif positions is None:
+            positions = self._order(sort_by, ascending)
+        elif len(positions) > GLOBAL_ORDER_SHARE * len(self):
+            selected = np.zeros(len(self), dtype=bool)
+            selected[positions] = True
+            order = self._order(sort_by, ascending)
+            positions = order[selected[order]]
+        else:
+            values = self._sort_key(sort_by, ascending)[positions]
+            positions = positions[np.argsort(values, kind="stable")]
+
+        self._sorted[key] = positions
+        while len(self._sorted) > SORT_CACHE_ENTRIES:
+            self._sorted.popitem(last=False)
+        return positions
+
+    def rows(self, filters=None, sort_by=None, ascending=True, number=0, page_size=PAGE_SIZE):
+        """
+        Page ``number`` (0-based) of the pivot rows matching ``filters``,
+        sorted by a dimension or measure, and the total number of matches.
+        """
+        positions = self._sorted_positions(filters, sort_by, ascending)
+        start = number * page_size
+        return self.frame.take(positions[start:start + page_size]), len(positions)
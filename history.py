@@ -0,0 +1,196 @@
+"""
+Local history of reconciled periods for cross-month trend queries.
+
+Each run used to end with a one-off download; comparing months meant
+re-running the pipeline on the old files. ``save_period`` now stores a
+period's India Conso pivot in a Parquet dataset partitioned by period and
+HUB::
+
+    HISTORY_DIR/period=2024-03/HUB=Kolkata/<part>.parquet
+
+Saving a period again replaces it. Queries read only the columns they need
+and prune partitions with ``filters``, so trends over many months
+(``variance_trend``) come back in milliseconds.
+
+The history is read and written with pyarrow (a requirement of the app).
+
+    python history.py [--dir DIR] periods
+    python history.py [--dir DIR] trend --by Owner [--periods 2024-02 2024-03]
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from recon import PIVOT_KEYS
+
+
+DEFAULT_HISTORY_DIR = os.environ.get(
+    "HOURS_RECON_HISTORY_DIR",
+    os.path.join(os.path.expanduser("~"), ".local", "share", "hours_recon", "history"),
+)
+
+# Columns kept per pivot row, besides the period and HUB partition keys.
+HISTORY_KEYS = [k for k in PIVOT_KEYS if k != "HUB"]
+HISTORY_VALUES = [
+    "Total Attendance", "Total Performed", "Total Billed",
+    "Var. Performed Vs. Billed", "Inter assignment adjustment",
+]
+DATE_KEYS = ["Period From", "Period To"]
+
+PERIOD_LABEL = re.compile(r"[\w.-]+")
+
+# Read partition values as plain strings: the inferred dictionary type
+# cannot represent the null HUB partition of unmapped locations.
+PARTITIONING = ds.partitioning(pa.schema([("period", pa.string()), ("HUB", pa.string())]), flavor="hive")
+
+
+def _partition_dir(directory, period):
+    return os.path.join(directory, f"period={period}")
+
+
+def history_frame(india_conso):
+    """
+    The columns of ``india_conso`` that are stored, with one schema for all
+    periods: text keys as strings, dates and values as numbers.
+    """
+    frame = pd.DataFrame(index=india_conso.index)
+    for col in ["HUB"] + HISTORY_KEYS:
+        if col in DATE_KEYS:
+            frame[col] = pd.to_datetime(india_conso[col]).astype("datetime64[ns]")
+        else:
+            values = india_conso[col].astype(object)
+            frame[col] = values.where(values.isna(), values.astype(str)).astype("string")
+    for col in HISTORY_VALUES:
+        frame[col] = pd.to_numeric(india_conso[col], errors="coerce").astype("float64")
+    return frame.reset_index(drop=True)
+
+
+def save_period(india_conso, period, directory=None):
+    """
+    Store ``india_conso`` as ``period`` (e.g. "2024-03"), replacing any
+    earlier save of that period. Returns the period's directory.
+    """
+    directory = directory or DEFAULT_HISTORY_DIR
+    period = str(period)
+    if not PERIOD_LABEL.fullmatch(period):
+        raise ValueError(f"Invalid period label {period!r}: use letters, digits, '-', '_' or '.'")
+    os.makedirs(directory, exist_ok=True)
+
+    # Written next to the dataset under a dot-name (ignored by readers),
+    # then swapped in, so a reader never sees a half-written period.
+    staging = os.path.join(directory, f".staging-{uuid.uuid4().hex}")
+    try:
+        history_frame(india_conso).to_parquet(staging, partition_cols=["HUB"], index=False)
+        target = _partition_dir(directory, period)
+        if os.path.exists(target):
+            retired = os.path.join(directory, f".retired-{uuid.uuid4().hex}")
+            os.rename(target, retired)
+            os.rename(staging, target)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.rename(staging, target)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def stored_periods(directory=None):
+    """Sorted labels of the periods in the history."""
+    directory = directory or DEFAULT_HISTORY_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name[len("period="):] for name in os.listdir(directory)
+        if name.startswith("period=") and os.path.isdir(os.path.join(directory, name))
+    )
+
+
+def load_history(periods=None, columns=None, hubs=None, directory=None):
+    """
+    Stored pivot rows as one frame with "period" and "HUB" columns.
+
+    ``periods`` and ``hubs`` restrict the partitions that are read and
+    ``columns`` the columns; None means all.
+    """
+    directory = directory or DEFAULT_HISTORY_DIR
+    available = stored_periods(directory)
+    periods = available if periods is None else [p for p in map(str, periods) if p in available]
+    wanted = list(dict.fromkeys(["period", "HUB"] + list(columns or HISTORY_KEYS + HISTORY_VALUES)))
+    if not periods:
+        return pd.DataFrame(columns=wanted)
+
+    filters = [("period", "in", periods)]
+    if hubs is not None:
+        filters.append(("HUB", "in", [str(h) for h in hubs]))
+    history = pd.read_parquet(directory, columns=wanted, filters=filters, partitioning=PARTITIONING)
+    return history[wanted]
+
+
+def variance_trend(by="Owner", periods=None, hubs=None, directory=None):
+    """
+    Period-over-period hours and variance per ``by`` (a column or a list of
+    HUB / HISTORY_KEYS columns).
+
+    One row per group and period with the summed hours, the variance
+    (billed - performed) and its change from the previous stored period.
+    A group absent from the previous period counts as zero there; the
+    first period has no change.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    values = ["Total Performed", "Total Billed", "Var. Performed Vs. Billed"]
+    history = load_history(periods, columns=by + values, hubs=hubs, directory=directory)
+
+    trend = (
+        history.groupby(by + ["period"], dropna=False, observed=True)[values]
+        .sum()
+        .reset_index()
+        .rename(columns={"Var. Performed Vs. Billed": "Variance"})
+    )
+    ordered = sorted(trend["period"].dropna().unique())
+    previous = dict(zip(ordered[1:], ordered[:-1]))
+    trend["Previous period"] = trend["period"].map(previous).astype("string")
+
+    before = trend[by + ["period", "Variance"]].rename(
+        columns={"period": "Previous period", "Variance": "Previous variance"}
+    )
+    trend = trend.merge(before, on=by + ["Previous period"], how="left")
+    has_previous = trend["Previous period"].notna()
+    trend["Previous variance"] = trend["Previous variance"].where(~has_previous, trend["Previous variance"].fillna(0))
+    trend["Variance change"] = trend["Variance"] - trend["Previous variance"]
+    return trend.sort_values(by + ["period"], kind="stable", ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the Hours Recon history")
+    parser.add_argument("--dir", default=DEFAULT_HISTORY_DIR, help=f"history directory (default: {DEFAULT_HISTORY_DIR})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("periods", help="list the stored periods")
+    trend = commands.add_parser("trend", help="period-over-period variance per group")
+    trend.add_argument("--by", nargs="+", default=["Owner"], choices=["HUB"] + HISTORY_KEYS)
+    trend.add_argument("--periods", nargs="+", help="periods to include (default: all)")
+    trend.add_argument("--hubs", nargs="+", help="HUBs to include (default: all)")
+    trend.add_argument("-o", "--output", help="write the trend to this CSV instead of printing it")
+    args = parser.parse_args(argv)
+
+    if args.command == "periods":
+        print("\n".join(stored_periods(args.dir)))
+        return 0
+
+    result = variance_trend(args.by, periods=args.periods, hubs=args.hubs, directory=args.dir)
+    if args.output:
+        result.to_csv(args.output, index=False)
+    else:
+        with pd.option_context("display.max_rows", None, "display.width", None):
+            print(result.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,390 @@
+"""
+Pluggable file ingestion for the four input files.
+
+``read_file`` tries a fast engine first and falls back to the original
+pandas path (C CSV parser / openpyxl) if the fast engine is unavailable or
+rejects the file:
+
+- .csv  -> pyarrow CSV reader (multi-threaded, columnar)
+- .xlsx -> calamine (Rust, streams the sheet XML) via python-calamine
+
+Known columns are read with explicit dtypes so neither engine has to infer
+them. ``read_file_with_engine`` also returns the name of the engine that
+handled the file. ``iter_file_chunks`` streams a file in row batches for
+the low-memory (chunked) pipeline, and ``read_sample`` reads just its first
+rows for validation.
+"""
+import csv
+import io
+import itertools
+import re
+
+import pandas as pd
+
+
+# Explicit dtypes for the columns main.py selects with ``usecols``. Codes
+# that are later normalized with ``.replace(".0", "")`` (Customer Code,
+# SO Line No, WF_TaskID) and Invoice No are left to inference so their text
+# form stays what it has always been.
+COLUMN_DTYPES = {
+    "Order No": "str",
+    "Period From": "str",
+    "Period To": "str",
+    "Invoice dt": "str",
+    "Location": "str",
+    "Customer Name": "str",
+    "Billing Pattern": "str",
+    "No of Post": "float64",
+    "Deployment Hrs": "float64",
+    "Performed Hrs": "float64",
+    "Billed Hrs": "float64",
+    "Billed Vs Performed": "float64",
+    "Contracted Vs Performed": "float64",
+    "ERP Cont Hrs": "float64",
+    "Saturn Cont Hrs": "float64",
+    "Scheduled Hrs": "float64",
+}
+
+
+def _dtypes_for(usecols):
+    if usecols is None:
+        return None
+    return {c: COLUMN_DTYPES[c] for c in usecols if c in COLUMN_DTYPES}
+
+
+# =========================
+# ENGINES
+# =========================
+def _read_csv_pyarrow(file, header, usecols, dtype):
+    return pd.read_csv(
+        file,
+        header=header,
+        encoding="latin1",
+        usecols=usecols,
+        dtype=dtype,
+        engine="pyarrow"
+    )
+
+
+def _read_csv_default(file, header, usecols, dtype):
+    return pd.read_csv(
+        file,
+        header=header,
+        encoding="latin1",
+        index_col=False,
+        usecols=usecols
+    )
+
+
+def _read_xlsx_calamine(file, header, usecols, dtype):
+    return pd.read_excel(
+        file,
+        header=header,
+        usecols=usecols,
+        dtype=dtype,
+        engine="calamine"
+    )
+
+
+def _read_xlsx_default(file, header, usecols, dtype):
+    return pd.read_excel(
+        file,
+        header=header,
+        usecols=usecols
+    )
+
+
+def _module_available(name):
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+# (name, reader, required module) in order of preference, per extension.
+ENGINES = {
+    ".csv": [
+        ("pyarrow", _read_csv_pyarrow, "pyarrow"),
+        ("pandas-c", _read_csv_default, None),
+    ],
+    ".xlsx": [
+        ("calamine", _read_xlsx_calamine, "python_calamine"),
+        ("openpyxl", _read_xlsx_default, None),
+    ],
+}
+
+
+# =========================
+# PUBLIC API
+# =========================
+def read_file_with_engine(file, header=0, usecols=None, fast=True):
+    """
+    Read a .csv/.xlsx upload and return ``(frame, engine_name)``.
+
+    With ``fast=False`` only the original pandas path is used. A fast engine
+    that fails is skipped and the next one is tried; the reported name then
+    carries a " (fallback)" suffix.
+    """
+    name = file.name.lower()
+    ext = next((e for e in ENGINES if name.endswith(e)), None)
+    if ext is None:
+        raise ValueError(f"Unsupported file type: {file.name}")
+
+    engines = ENGINES[ext] if fast else ENGINES[ext][-1:]
+    dtype = _dtypes_for(usecols)
+    fell_back = False
+
+    for engine_name, reader, module in engines:
+        if module and not _module_available(module):
+            continue
+        if hasattr(file, "seek"):
+            file.seek(0)
+        try:
+            df = reader(file, header, usecols, dtype)
+        except Exception:
+            if reader is engines[-1][1]:
+                raise
+            fell_back = True
+            continue
+        return df, engine_name + (" (fallback)" if fell_back else "")
+
+
+def read_file(file, header=0, usecols=None):
+    return read_file_with_engine(file, header=header, usecols=usecols)[0]
+
+
+# =========================
+# CHUNKED READING
+# =========================
+def _iter_csv_chunks(file, header, usecols, dtype, chunk_rows):
+    with pd.read_csv(
+        file,
+        header=header,
+        encoding="latin1",
+        index_col=False,
+        usecols=usecols,
+        dtype=dtype,
+        chunksize=chunk_rows
+    ) as reader:
+        yield from reader
+
+
+def _iter_xlsx_chunks(file, header, usecols, dtype, chunk_rows):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        for _ in range(header):
+            next(rows, None)
+        names = list(next(rows, ()))
+        if usecols is None:
+            keep = list(range(len(names)))
+        else:
+            missing = set(usecols) - set(names)
+            if missing:
+                raise ValueError(f"Usecols do not match columns, columns expected but not found: {sorted(missing)}")
+            keep = [i for i, name in enumerate(names) if name in usecols]
+        columns = [names[i] for i in keep]
+
+        batch = []
+        yielded = False
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            batch.append([row[i] if i < len(row) else None for i in keep])
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=columns).astype(dtype or {})
+                yielded = True
+                batch = []
+        if batch or not yielded:
+            # Like the CSV reader, a sheet without data rows gives one empty frame.
+            yield pd.DataFrame(batch, columns=columns).astype(dtype or {})
+    finally:
+        workbook.close()
+
+
+CHUNK_READERS = {
+    ".csv": _iter_csv_chunks,
+    ".xlsx": _iter_xlsx_chunks,
+}
+
+
+def iter_file_chunks(file, header=0, usecols=None, chunk_rows=250_000):
+    """
+    Yield a .csv/.xlsx upload as frames of at most ``chunk_rows`` rows.
+
+    Only one batch is held in memory at a time: CSV goes through the pandas
+    C parser's chunked reader, xlsx through openpyxl's read-only row
+    iterator (blank rows are skipped). Known columns get the same explicit
+    dtypes as ``read_file``; the rest are inferred per chunk.
+    """
+    name = file.name.lower()
+    ext = next((e for e in CHUNK_READERS if name.endswith(e)), None)
+    if ext is None:
+        raise ValueError(f"Unsupported file type: {file.name}")
+    if hasattr(file, "seek"):
+        file.seek(0)
+    yield from CHUNK_READERS[ext](file, header, usecols, _dtypes_for(usecols), chunk_rows)
+
+
+# =========================
+# SAMPLING
+# =========================
+class _StringRef(int):
+    """A shared-string index standing in for its text until the table is read."""
+
+
+class _SharedStringRefs:
+    """Shared-string table for openpyxl's sheet parser that records the indices used."""
+
+    def __init__(self):
+        self.used = set()
+
+    def __getitem__(self, index):
+        self.used.add(index)
+        return _StringRef(index)
+
+
+# One <si> entry of the shared-string table (group 1: its namespace prefix).
+SHARED_STRING_ENTRY = re.compile(rb"<(?:(\w+):)?si\b[^>]*?(?:/>|>.*?</(?:\w+:)?si>)", re.S)
+
+
+def _shared_string_text(entry, prefix):
+    """Text of one <si> entry as openpyxl reads it: plain and rich-text runs, no phonetic runs."""
+    from openpyxl.xml.constants import SHEET_MAIN_NS
+    from openpyxl.xml.functions import fromstring
+
+    declare = f'xmlns="{SHEET_MAIN_NS}"' + (f' xmlns:{prefix.decode()}="{SHEET_MAIN_NS}"' if prefix else "")
+    si = fromstring(f"<root {declare}>".encode() + entry + b"</root>")[0]
+    t, r = f"{{{SHEET_MAIN_NS}}}t", f"{{{SHEET_MAIN_NS}}}r"
+    parts = [child.text if child.tag == t else child.findtext(t) for child in si if child.tag in (t, r)]
+    return "".join(p or "" for p in parts).replace("x005F_", "")
+
+
+def _read_shared_strings(source, wanted, chunk_bytes=1 << 20):
+    """
+    ``{index: text}`` for the ``wanted`` indices of a shared-string table
+    (its XML stream). Entries are only matched, not parsed, up to the last
+    wanted one; reading stops there.
+    """
+    found = {}
+    last = max(wanted, default=-1)
+    index = 0
+    buffer = b""
+    while index <= last:
+        chunk = source.read(chunk_bytes)
+        buffer += chunk
+        end = 0
+        for match in SHARED_STRING_ENTRY.finditer(buffer):
+            if index in wanted:
+                found[index] = _shared_string_text(match.group(0), match.group(1))
+            index += 1
+            end = match.end()
+            if index > last:
+                break
+        buffer = buffer[end:]
+        if not chunk:
+            break
+    return found
+
+
+def _xlsx_head_rows(file, rows):
+    """
+    The first ``rows`` rows of the first sheet, as openpyxl's read-only
+    iter_rows gives them. ``load_workbook`` would first read the whole
+    shared-string table, which grows with the file; here the rows are parsed
+    with placeholders and only the strings they use are looked up.
+    """
+    from openpyxl.reader.excel import ExcelReader
+    from openpyxl.styles.stylesheet import apply_stylesheet
+    from openpyxl.xml.constants import SHARED_STRINGS
+
+    reader = ExcelReader(file, read_only=True, data_only=True)
+    try:
+        reader.read_manifest()
+        refs = reader.shared_strings = _SharedStringRefs()
+        reader.read_workbook()
+        apply_stylesheet(reader.archive, reader.wb)
+        reader.read_worksheets()
+        head = [list(row) for row in itertools.islice(reader.wb.worksheets[0].iter_rows(values_only=True), rows)]
+
+        part = reader.package.find(SHARED_STRINGS)
+        if refs.used and part is not None:
+            with reader.archive.open(part.PartName[1:]) as source:
+                strings = _read_shared_strings(source, refs.used)
+            head = [[strings.get(v) if type(v) is _StringRef else v for v in row] for row in head]
+    finally:
+        reader.archive.close()
+    return head
+
+
+def read_head_rows(file, rows):
+    """
+    The first ``rows`` rows of a .csv/.xlsx upload as lists of raw cell
+    values (blank cells as None), without header handling, and rewind it.
+    Only those rows are read: CSV through the csv module, xlsx through
+    openpyxl's read-only sheet parser (see ``_xlsx_head_rows``).
+    """
+    name = file.name.lower()
+    if hasattr(file, "seek"):
+        file.seek(0)
+    try:
+        if name.endswith(".csv"):
+            text = io.TextIOWrapper(file, encoding="latin1", newline="")
+            try:
+                return [[v if v != "" else None for v in row] for row in itertools.islice(csv.reader(text), rows)]
+            finally:
+                text.detach()  # leave the upload open
+        if name.endswith(".xlsx"):
+            return _xlsx_head_rows(file, rows)
+        raise ValueError(f"Unsupported file type: {file.name}")
+    finally:
+        if hasattr(file, "seek"):
+            file.seek(0)
+
+
+def _column_names(values):
+    """Header cells named as pandas names them: "Unnamed: <i>" for blanks, "<name>.<n>" for repeats."""
+    names = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_sample(file, header=0, rows=1000):
+    """
+    Read the header and at most the first ``rows`` data rows of a .csv/.xlsx
+    upload, without parsing the rest, and rewind it. Column types are
+    inferred from the sample; blank xlsx rows are skipped.
+    """
+    name = file.name.lower()
+    if name.endswith(".csv"):
+        if hasattr(file, "seek"):
+            file.seek(0)
+        try:
+            return pd.read_csv(file, header=header, encoding="latin1", index_col=False, nrows=rows)
+        finally:
+            if hasattr(file, "seek"):
+                file.seek(0)
+
+    # pd.read_excel parses the whole sheet even with ``nrows``; read only
+    # the rows needed.
+    head = read_head_rows(file, header + 1 + rows)
+    if len(head) <= header:
+        raise ValueError(f"No header row found at row {header + 1}")
+    names = _column_names(head[header])
+    data = [
+        (row + [None] * len(names))[:len(names)]
+        for row in head[header + 1:]
+        if any(v is not None for v in row)
+    ]
+    return pd.DataFrame(data, columns=names)
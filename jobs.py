@@ -0,0 +1,208 @@
+"""
+Background execution of reconciliation runs.
+
+A run used to execute inside the Streamlit script, so the page froze while
+it ran and any widget change reran the script and threw the work away.
+Runs are now submitted to a process-wide ``JobManager``. It is a thread
+pool whose size caps how many reconciliations execute at once on a shared
+instance; further jobs wait in its queue. Each run gets a ``Job`` with an ID
+that the session keeps in ``st.session_state``. The page polls the job for
+progress messages and its result instead of doing the work itself.
+
+Threads, not processes, are used so that jobs share the process-wide caches
+in cache.py.
+"""
+import io
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("HOURS_RECON_MAX_JOBS", "2"))
+
+# Finished jobs kept for sessions that have not picked up their result yet,
+# and for how long after they were last looked at. A result holds the whole
+# India Conso pivot and its explorer, so unclaimed ones are dropped.
+MAX_FINISHED_JOBS = 100
+FINISHED_JOB_SECONDS = int(os.environ.get("HOURS_RECON_JOB_SECONDS", "3600"))
+
+
+class UploadSnapshot(io.BytesIO):
+    """In-memory copy of an uploaded file that a worker can read on its own."""
+
+    def __init__(self, upload):
+        super().__init__(upload.getvalue())
+        self.name = upload.name
+
+
+class Job:
+    """One submitted run; written by its worker thread, read by the UI."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = "queued"
+        self.messages = []
+        self.result = None
+        self.error = None
+        self.exception = None
+        self.traceback = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.seen_at = self.submitted_at
+        self.discarded = False
+        self._cleanups = []
+        self._cleanup_lock = threading.Lock()
+
+    def log(self, msg):
+        """Progress callback for the running job (``log=`` of the pipeline functions)."""
+        self.messages.append(msg)
+
+    def add_cleanup(self, func):
+        """
+        Call ``func()`` once the job is dropped (discarded, expired or over
+        MAX_FINISHED_JOBS) and has finished, e.g. to delete its output files.
+        """
+        with self._cleanup_lock:
+            self._cleanups.append(func)
+
+    def _release(self):
+        """Run the cleanups registered so far, each at most once."""
+        with self._cleanup_lock:
+            cleanups, self._cleanups = self._cleanups, []
+        for func in cleanups:
+            try:
+                func()
+            except Exception:
+                traceback.print_exc()
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    @property
+    def seconds(self):
+        """Run time so far, or in total once finished."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobManager:
+    """Runs jobs on at most ``max_workers`` threads and keeps them by ID."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recon-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue ``func(job, *args, **kwargs)`` and return its ``Job``.
+
+        The return value of ``func`` becomes ``job.result``; an exception
+        marks the job failed with its message in ``job.error`` and the
+        exception itself in ``job.exception``.
+        """
+        job = Job(uuid.uuid4().hex[:12])
+        with self._lock:
+            self._jobs[job.id] = job
+            dropped = self._prune()
+        self._release_all(dropped)
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        job.started_at = time.time()
+        job.status = "running"
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            job.exception = e
+            job.error = f"{type(e).__name__}: {e}"
+            job.traceback = traceback.format_exc()
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            # Dropped while it ran: nobody will pick up the result.
+            if job.discarded:
+                job._release()
+
+    def _drop(self, job_id):
+        """Remove a job (caller holds the lock); returns it if its cleanups can run now."""
+        job = self._jobs.pop(job_id)
+        job.discarded = True
+        return job if job.done else None
+
+    def _prune(self):
+        """Drop the finished jobs over the cap or unclaimed for too long; returns them."""
+        expired = time.time() - FINISHED_JOB_SECONDS
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        over_cap = finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]
+        # finished_at is set just after the status, so it may still be None.
+        stale = [
+            job_id for job_id in finished[len(over_cap):]
+            if max(self._jobs[job_id].seen_at, self._jobs[job_id].finished_at or 0) < expired
+        ]
+        return [self._drop(job_id) for job_id in over_cap + stale]
+
+    @staticmethod
+    def _release_all(dropped):
+        for job in dropped:
+            if job is not None:
+                job._release()
+
+    def get(self, job_id):
+        """The job with ``job_id``, or None once it was discarded or expired."""
+        with self._lock:
+            dropped = self._prune()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.seen_at = time.time()
+        self._release_all(dropped)
+        return job
+
+    def discard(self, job_id):
+        """
+        Forget a job its session has replaced, so its result can be freed.
+
+        A job still queued or running completes, but is not kept; its
+        cleanups run when it finishes.
+        """
+        with self._lock:
+            dropped = [self._drop(job_id)] if job_id in self._jobs else []
+        self._release_all(dropped)
+
+    def jobs_ahead(self, job):
+        """Number of queued jobs submitted before ``job`` (0 once it runs)."""
+        if job.status != "queued":
+            return 0
+        with self._lock:
+            return sum(
+                1 for other in self._jobs.values()
+                if other.status == "queued" and other.submitted_at < job.submitted_at
+            )
+
+    @property
+    def running(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == "running")
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def default_job_manager():
+    """Process-wide job manager shared by every Streamlit session."""
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = JobManager()
+        return _default_manager
@@ -0,0 +1,109 @@
+"""
+Interned key columns.
+
+Order No, Location, Customer Code and the composite keys built from them
+repeat heavily across the pillar rows. Instead of running the string
+normalization chain over every row, the helpers here normalize each
+distinct value once and return categorical columns (integer codes plus one
+copy of each string). Lookups against the small reference frames then work
+on the distinct values only and map back through the codes.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _categorical(codes, values, index=None, name=None, sort=True):
+    """Categorical Series from per-row ``codes`` into ``values`` (NaN-aware)."""
+    value_codes, categories = pd.factorize(pd.Index(values), sort=False)
+    # All-missing values leave no categories (and nothing to rank).
+    if sort and len(categories):
+        try:
+            # Sorted categories keep groupby(sort=True) in the same order as on strings.
+            order = np.argsort(categories, kind="stable")
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            value_codes = np.where(value_codes >= 0, rank[value_codes], -1)
+            categories = categories.take(order)
+        except TypeError:
+            pass
+    row_codes = np.where(codes >= 0, value_codes[codes], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(row_codes, categories=categories),
+        index=index,
+        name=name,
+    )
+
+
+def intern(s, normalize=None):
+    """
+    Return ``normalize(s)`` as a categorical Series.
+
+    ``normalize`` (a Series -> Series function such as
+    ``recon.normalize_order``) is applied to the distinct values of ``s``
+    only. Missing values go through ``normalize`` like any other value, so
+    the result matches applying it row by row.
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    values = pd.Series(uniques)
+    if normalize is not None:
+        values = normalize(values)
+    return _categorical(codes, values.to_numpy(dtype=object), index=s.index, name=s.name)
+
+
+def intern_combined(columns, build, name=None):
+    """
+    Build a composite key from several aligned categorical Series, once per
+    distinct combination.
+
+    ``build`` receives a DataFrame holding each distinct combination of
+    ``columns`` (one row each) and returns the key for those rows, e.g.
+    ``lambda u: u["Location"] + "_" + u["Customer Code"]``. The result is a
+    categorical whose categories are left unsorted; it is meant for lookups,
+    not for ordering.
+    """
+    # Mixed-radix number over the category codes (shifted so -1/NaN is 0).
+    combined = np.zeros(len(columns[0]), dtype=np.int64)
+    for s in columns:
+        combined = combined * (len(s.cat.categories) + 1) + (s.cat.codes.to_numpy(dtype=np.int64) + 1)
+    codes, uniques = pd.factorize(combined)
+
+    parts = {}
+    for s in reversed(columns):
+        radix = len(s.cat.categories) + 1
+        part_codes = uniques % radix - 1
+        uniques = uniques // radix
+        categories = s.cat.categories
+        if len(categories) == 0:
+            # All missing: give the empty categories a string dtype so the
+            # missing values still combine with the other string keys.
+            categories = pd.Index([], dtype="str")
+        parts[s.name] = pd.Series(pd.api.extensions.take(categories.array, part_codes, allow_fill=True))
+    values = build(pd.DataFrame({s.name: parts[s.name] for s in columns}))
+    return _categorical(codes, pd.Series(values).to_numpy(dtype=object), index=columns[0].index, name=name, sort=False)
+
+
+def lookup_positions(index_values, keys):
+    """
+    Position of each of ``keys`` in ``index_values`` (-1 where missing).
+
+    ``index_values`` must be unique. Missing keys match a missing value in
+    ``index_values``, as a merge would. Categorical ``keys`` are resolved on
+    their categories and mapped back through the codes. A ``pd.Index`` is
+    used as is, so its hash table is built only once across calls.
+    """
+    index = index_values if isinstance(index_values, pd.Index) else pd.Index(index_values)
+    if isinstance(index.dtype, pd.CategoricalDtype):
+        index = index.astype(index.dtype.categories.dtype)
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        na_position = index.get_indexer([np.nan])[0] if index.hasnans else -1
+        codes = keys.cat.codes.to_numpy()
+        if len(keys.cat.categories) == 0:
+            return np.full(len(codes), na_position, dtype=np.intp)
+        found = index.get_indexer(keys.cat.categories)
+        return np.where(codes >= 0, found[np.maximum(codes, 0)], na_position)
+    return index.get_indexer(keys)
+
+
+def take(s, positions):
+    """Gather the values of ``s`` at ``positions``, -1 giving a missing value."""
+    return pd.api.extensions.take(s.array, positions, allow_fill=True)
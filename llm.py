@@ -1,23 +1,108 @@
-def generate_fix_suggestion(
-    user_prompt,
-    file_description,
-    expected_format,
-    error_message
-):
-    import requests
-    import json
+"""
+Plain-language fix suggestions for problems with the uploaded files.
 
-    # 🔐 Try getting API key from Streamlit secrets
-    try:
-        import streamlit as st
-        api_key = st.secrets["OPENROUTER_API_KEY"]
-    except Exception:
-        return "❌ API key not found. Please set OPENROUTER_API_KEY in Streamlit secrets."
+``generate_fix_suggestion`` answers one problem description and
+``generate_fix_suggestions`` several at once, on a small thread pool. Both:
+
+- reuse answers from ``SUGGESTION_CACHE``, keyed on a hash of the
+  normalized inputs with a TTL and LRU eviction, so the same file-format
+  error seen again by any session or rerun costs no round trip
+- send requests through one pooled ``requests.Session``
+- are bounded by ``timeout`` seconds
+
+The backend is picked with ``backend=`` or HOURS_RECON_LLM_BACKEND:
+"openrouter" (the default; needs OPENROUTER_API_KEY in Streamlit secrets
+or the environment) or "stub", a local canned answer for offline use and
+testing. Failures are returned as "❌ ..." messages, not raised, and are
+not cached.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+API_URL = "https://openrouter.ai/api/v1/chat/completions"
+MODEL = "openai/gpt-oss-120b:free"
+
+DEFAULT_BACKEND = os.environ.get("HOURS_RECON_LLM_BACKEND", "openrouter")
+DEFAULT_TIMEOUT = 30
+
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL_SECONDS = int(os.environ.get("HOURS_RECON_LLM_CACHE_TTL", str(24 * 60 * 60)))
+
+MAX_CONCURRENT_REQUESTS = 4
 
-    API_URL = "https://openrouter.ai/api/v1/chat/completions"
-    MODEL = "openai/gpt-oss-120b:free"
+TIMEOUT_MESSAGE = "❌ Request timed out. Please try again."
 
-    structured_prompt = f"""
+
+class SuggestionError(Exception):
+    """A backend could not answer; the message is what the user sees."""
+
+
+# =========================
+# RESPONSE CACHE
+# =========================
+class SuggestionCache:
+    """Thread-safe LRU of answers that expire ``ttl_seconds`` after they are stored."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = (text, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+SUGGESTION_CACHE = SuggestionCache()
+
+
+def _normalize(text):
+    return " ".join(str(text).split())
+
+
+def suggestion_key(backend, user_prompt, file_description, expected_format, error_message):
+    """Hash of the backend, model and whitespace-normalized inputs."""
+    h = hashlib.blake2b(digest_size=20)
+    for part in (backend, MODEL, user_prompt, file_description, expected_format, error_message):
+        h.update(_normalize(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# =========================
+# BACKENDS
+# =========================
+def build_prompt(user_prompt, file_description, expected_format, error_message):
+    return f"""
 You are an Excel support assistant for a finance team.
 
 Your job:
@@ -62,8 +147,44 @@ OUTPUT FORMAT:
 Final Answer:
 """
 
+
+def _api_key():
+    # 🔐 Streamlit secrets first, then the environment
+    try:
+        import streamlit as st
+        return st.secrets["OPENROUTER_API_KEY"]
+    except Exception:
+        pass
+    api_key = os.environ.get("OPENROUTER_API_KEY")
+    if not api_key:
+        raise SuggestionError("❌ API key not found. Please set OPENROUTER_API_KEY in Streamlit secrets or the environment.")
+    return api_key
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _http_session():
+    """One ``requests.Session`` per process, so connections are reused."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS))
+            _session = session
+        return _session
+
+
+def _openrouter_backend(inputs, timeout):
+    import requests
+
+    api_key = _api_key()
     try:
-        response = requests.post(
+        response = _http_session().post(
             url=API_URL,
             headers={
                 "Authorization": f"Bearer {api_key}",
@@ -72,26 +193,114 @@ Final Answer:
             data=json.dumps({
                 "model": MODEL,
                 "messages": [
-                    {"role": "user", "content": structured_prompt}
+                    {"role": "user", "content": build_prompt(**inputs)}
                 ],
                 "temperature": 0.2,
                 "max_tokens": 500
             }),
-            timeout=30
+            timeout=timeout
         )
-
         data = response.json()
 
-        if "choices" in data and len(data["choices"]) > 0:
-            return data["choices"][0]["message"]["content"]
-
-        return f"❌ Unable to generate fix suggestion.\n\nRaw response:\n{data}"
-
     except requests.exceptions.Timeout:
-        return "❌ Request timed out. Please try again."
+        raise SuggestionError(TIMEOUT_MESSAGE)
 
     except requests.exceptions.RequestException as e:
-        return f"❌ Network error: {str(e)}"
+        raise SuggestionError(f"❌ Network error: {str(e)}")
+
+    if "choices" in data and len(data["choices"]) > 0:
+        return data["choices"][0]["message"]["content"]
+
+    raise SuggestionError(f"❌ Unable to generate fix suggestion.\n\nRaw response:\n{data}")
+
+
+def _stub_backend(inputs, timeout):
+    """Offline answer that restates the problems as steps; no network."""
+    problems = [line.strip() for line in str(inputs["error_message"]).splitlines() if line.strip()]
+    steps = "\n".join(f"{i}. Correct this: {problem}" for i, problem in enumerate(problems, 1))
+    return (
+        "❌ Problem:\n"
+        f"The file does not match the expected format ({len(problems)} problem(s) found).\n\n"
+        f"✅ Fix:\n{steps}\n\n"
+        f"📌 Expected format:\n{inputs['expected_format']}"
+    )
 
+
+# name -> function(inputs, timeout) returning the answer or raising SuggestionError
+BACKENDS = {
+    "openrouter": _openrouter_backend,
+    "stub": _stub_backend,
+}
+
+
+# =========================
+# PUBLIC API
+# =========================
+def generate_fix_suggestion(
+    user_prompt,
+    file_description,
+    expected_format,
+    error_message,
+    backend=None,
+    timeout=DEFAULT_TIMEOUT,
+    cache=SUGGESTION_CACHE
+):
+    """
+    Suggest how to fix the file problem described by the four inputs.
+
+    Answers come from ``cache`` when the same (normalized) inputs were
+    answered before; pass ``cache=None`` to always ask ``backend``.
+    """
+    backend = backend or DEFAULT_BACKEND
+    inputs = {
+        "user_prompt": user_prompt,
+        "file_description": file_description,
+        "expected_format": expected_format,
+        "error_message": error_message,
+    }
+    key = suggestion_key(backend, **inputs)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        text = BACKENDS[backend](inputs, timeout)
+    except SuggestionError as e:
+        return str(e)
     except Exception as e:
         return f"❌ Unexpected error: {str(e)}"
+
+    if cache is not None:
+        cache.put(key, text)
+    return text
+
+
+def generate_fix_suggestions(batch, backend=None, timeout=DEFAULT_TIMEOUT, max_workers=MAX_CONCURRENT_REQUESTS):
+    """
+    Answer several requests at once; returns the answers in order.
+
+    Each request is a dict of ``generate_fix_suggestion``'s four inputs.
+    Identical requests are sent once and the distinct ones concurrently.
+    The whole batch takes at most about ``timeout`` seconds; a request
+    still running by then is answered with a timeout message.
+    """
+    backend = backend or DEFAULT_BACKEND
+    keys = [suggestion_key(backend, **r) for r in batch]
+    unique = dict(zip(keys, batch))
+    if len(unique) <= 1:
+        answers = {key: generate_fix_suggestion(**r, backend=backend, timeout=timeout) for key, r in unique.items()}
+        return [answers[key] for key in keys]
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(unique)), thread_name_prefix="llm")
+    try:
+        futures = {
+            key: pool.submit(generate_fix_suggestion, **r, backend=backend, timeout=timeout)
+            for key, r in unique.items()
+        }
+        done, _ = wait(futures.values(), timeout=timeout)
+    finally:
+        # Do not wait for stragglers; their answers still land in the cache.
+        pool.shutdown(wait=False, cancel_futures=True)
+    answers = {key: f.result() if f in done else TIMEOUT_MESSAGE for key, f in futures.items()}
+    return [answers[key] for key in keys]
@@ -1,31 +1,20 @@
-import streamlit as st
+import shutil
+import tempfile
+
 import pandas as pd
-import re
-from io import BytesIO
-import numpy as np
+import streamlit as st
 
-st.set_page_config(layout="wide")
+from cache import default_cache, default_stage_memo
+from duckdb_backend import available as duckdb_available, run_duckdb
+from explorer import DIMENSIONS, MEASURES, PAGE_SIZE, PivotExplorer, page
+from history import HISTORY_KEYS, PERIOD_LABEL, save_period, stored_periods, variance_trend
+from jobs import UploadSnapshot, default_job_manager
+from profiling import Profiler, profile_run
+from recon import hub_zone_table, iter_pillar_chunks, load_clean_inputs, normalize_order, reconcile_chunked, run_stages
+from report import OUTPUT_FORMATS, write_outputs
+from validation import ValidationError, fix_suggestion, validate_inputs
 
-# =========================
-# FILE READER (UNCHANGED)
-# =========================
-def read_file(file, header=0, usecols=None):
-    
-    if file.name.endswith(".csv"):
-        return pd.read_csv(
-            file,
-            header=header,
-            encoding="latin1",
-            index_col=False,
-            usecols=usecols
-        )
-
-    elif file.name.endswith(".xlsx"):
-        return pd.read_excel(
-            file,
-            header=header,
-            usecols=usecols
-        )
+st.set_page_config(layout="wide")
 
 # =========================
 # HEADER
@@ -61,7 +50,57 @@ st.divider()
 # =========================
 # RUN BUTTON
 # =========================
-run = st.button("▶️ Run Processing")
+run_col, profile_col, backend_col, memory_col = st.columns([1, 2, 1, 1])
+
+with run_col:
+    run = st.button("▶️ Run Processing")
+
+with profile_col:
+    profile_mode = st.selectbox(
+        "Profiling report",
+        ["Off", "cProfile", "pyinstrument"],
+        help="Stage timings are always shown. A full-run profile adds overhead."
+    )
+
+with backend_col:
+    backend = st.selectbox(
+        "Engine",
+        ["pandas"] + (["DuckDB"] if duckdb_available() else []),
+        help="pandas is the reference engine. DuckDB runs the joins and the pivot multi-threaded."
+    )
+
+with memory_col:
+    low_memory = st.checkbox(
+        "Low-memory mode",
+        help="Stream the pillar file in chunks. Use for very large pillar files; results are identical."
+    )
+
+# Display name -> report.OUTPUT_FORMATS key
+OUTPUT_LABELS = {
+    "Excel workbook": "xlsx",
+    "Zip of per-HUB workbooks": "zip",
+    "Parquet": "parquet",
+    "CSV": "csv",
+}
+
+formats_col, period_col = st.columns([3, 1])
+
+with formats_col:
+    output_labels = st.multiselect(
+        "Output formats",
+        list(OUTPUT_LABELS),
+        default=["Excel workbook"],
+        help="The zip holds the India Conso workbook and one workbook per HUB, written in parallel. "
+             "Parquet and CSV hold the India Conso sheet and are much faster to produce than Excel."
+    )
+
+with period_col:
+    history_period = st.text_input(
+        "Save to history as period",
+        placeholder="e.g. 2024-03",
+        help="Optional. Stores the pivot for month-over-month trends; saving a period again replaces it."
+    ).strip()
+
 log_container = st.container()
 
 st.divider()
@@ -70,6 +109,17 @@ st.divider()
 # DOCUMENTATION SECTION
 # =========================
 
+with st.expander("📈 Variance History"):
+    periods = stored_periods()
+    if not periods:
+        st.write("No periods saved yet. Enter a period next to **Run Processing** to save a run.")
+    else:
+        trend_by_col, trend_periods_col = st.columns([1, 3])
+        trend_by = trend_by_col.selectbox("Group by", ["Owner", "HUB"] + [k for k in HISTORY_KEYS if k != "Owner"])
+        trend_periods = trend_periods_col.multiselect("Periods", periods, default=periods[-6:])
+        if trend_periods:
+            st.dataframe(variance_trend(trend_by, periods=trend_periods), hide_index=True)
+
 with st.expander("📘 What This Tool Does"):
     st.write("""
     This tool reconciles **performed hours vs billed hours** across all orders.
@@ -146,264 +196,279 @@ with st.expander("💰 Financial Logic"):
     """)
 
 # =========================
-# MAIN PROCESSING (UNCHANGED)
+# MAIN PROCESSING
 # =========================
-if run:
-
-    if uploaded_file_dump and uploaded_file_pillar and uploaded_file_owner and uploaded_file_attendance:
-
-        log_container.write("Reading files...")
-
-        dump = read_file( uploaded_file_dump, header=2, usecols=["Order No","Period From","Period To","Invoice dt"] )
-
-        pillar = read_file( uploaded_file_pillar, header=2, usecols=[ "Location","Customer Code","Customer Name","Order No","Invoice No", "SO Line No","No of Post","Deployment Hrs","WF_TaskID", "Performed Hrs","Billed Hrs","Billed Vs Performed", "Contracted Vs Performed","Billing Pattern", "ERP Cont Hrs","Saturn Cont Hrs","Scheduled Hrs" ] )
-
-        owner_map = read_file(uploaded_file_owner)
-
-        attendance = read_file(uploaded_file_attendance, header=2)
-
-        log_container.write("Cleaning data...")
-        owner_map.columns = owner_map.columns .str.strip() .str.lower() .str.replace(" ", "_") 
-
-        str_cols = dump.select_dtypes(include="object").columns
-        dump[str_cols] = dump[str_cols].apply(lambda col: col.str.strip())
-
-        pillar = pillar[pillar["Performed Hrs"] + pillar["Billed Hrs"] > 0]
-
-        str_cols = pillar.select_dtypes(include="object").columns
-        pillar[str_cols] = pillar[str_cols].apply(lambda col: col.str.strip())
-
-        def normalize_order(s):
-            return (
-                s.astype(str)
-                .str.strip()
-                .str.replace(" ", "", regex=False)
-                .str.upper()
-            )
-
-        dump["Order No"] = normalize_order(dump["Order No"])
-        pillar["Order No"] = normalize_order(pillar["Order No"])
-
-        dump["Period From"] = pd.to_datetime(dump["Period From"], errors="coerce")
-        dump["Period To"] = pd.to_datetime(dump["Period To"], errors="coerce")
-        dump["Invoice dt"] = pd.to_datetime(dump["Invoice dt"], errors="coerce")
-
-        dump = dump.sort_values(
-            ["Invoice dt", "Period To", "Period From"],
-            ascending=[False, False, False]
-        )
-        dump_first = dump.drop_duplicates(subset=["Order No"], keep="first").copy()
-
-        dump_first["Date_Range"] = (
-            dump_first["Period From"].dt.day.astype("Int64").astype(str)
-            + "-"
-            + dump_first["Period To"].dt.day.astype("Int64").astype(str)
+def run_reconciliation(job, files, whole_run_mode, backend, low_memory, formats, history_period):
+    """Body of a background job: read, reconcile and write the outputs to a new temporary directory."""
+    dump_file, pillar_file, owner_file, attendance_file = files
+    profiler = Profiler()
+
+    with profile_run(whole_run_mode) as whole_run:
+
+        job.log("Validating files...")
+
+        with profiler.stage("validate"):
+            validation = validate_inputs(dump_file, pillar_file, owner_file, attendance_file)
+        for issue in validation.warnings:
+            job.log("⚠️ " + validation.summary([issue]))
+        if not validation.ok:
+            raise ValidationError(validation)
+
+        job.log("Reading files...")
+
+        engines = {}
+        keys = {}
+        frames = load_clean_inputs(
+            dump_file,
+            None if low_memory else pillar_file,
+            owner_file,
+            attendance_file,
+            cache=default_cache(),
+            engines=engines,
+            keys=keys,
+            profiler=profiler
         )
 
-        pillar = pillar.merge(
-            dump_first[["Order No","Period From","Period To","Date_Range"]],
-            on="Order No",
-            how="left"
-        )
-
-        log_container.write("Processing attendance...")
-
-        def normalize_attendance_col(col):
-            if not isinstance(col, str):
-                return col
-            nums = re.findall(r"\d+", col)
-            if len(nums) == 2:
-                return f"{int(nums[0])}-{int(nums[1])}"
-            return col
-
-        attendance.columns = [normalize_attendance_col(c) for c in attendance.columns]
-
-        def normalize_attendance_row_label(s):
-            return (
-                s.astype(str)
-                .str.upper()
-                .str.strip()
-                .str.replace(" ", "", regex=False)
-                .str.replace("-", "", regex=False)
+        if low_memory:
+            if backend != "pandas":
+                job.log("Low-memory mode uses the pandas engine.")
+            india_conso = reconcile_chunked(
+                frames["dump"],
+                iter_pillar_chunks(pillar_file),
+                frames["owner_map"],
+                frames["attendance"],
+                log=job.log,
+                cleaned=True,
+                profiler=profiler
+            )
+        elif backend == "DuckDB":
+            india_conso, _ = run_duckdb(
+                frames,
+                log=job.log,
+                profiler=profiler
+            )
+        else:
+            india_conso, _ = run_stages(
+                frames,
+                keys=keys,
+                memo=default_stage_memo(),
+                log=job.log,
+                profiler=profiler
             )
 
-        pillar["SO Line No"] = (
-            pillar["SO Line No"]
-            .astype(str)
-            .str.replace(".0","", regex=False)
-            .str.strip()
-        )
-
-        pillar["row_key"] = (
-            pillar["Order No"].astype(str).str.strip()
-            + pillar["SO Line No"].astype(str).str.strip()
-        )
-
-        attendance["row_key"] = normalize_attendance_row_label(attendance["Row Labels"])
-
-        attendance_long = attendance.melt(
-            id_vars=["row_key"],
-            var_name="Date_Range",
-            value_name="Total Attendance"
-        )
-
-        pillar = pillar.merge(
-            attendance_long,
-            on=["row_key","Date_Range"],
-            how="left"
-        )
-
-        pillar = pillar.drop(columns=["row_key"])
-
-        log_container.write("Creating HUB Zone mapping...")
-
-        # (HUB ZONE DATA UNCHANGED)
-        hub_zone_data = [ ("ALIGRD","Kolkata","Kolkata Zone"), ("ASLGRD","Kolkata","East COC"), ("BBRGRD","Kolkata","Odisha Zone"), ("BBLGRD","Kolkata","Odisha Zone"), ("JAJGRD","Kolkata","Odisha Zone"), ("JHAGRD","Kolkata","Odisha Zone"), ("JASGRD","Kolkata","East COC"), ("PATGRD","Kolkata","East COC"), ("PTNGRD","Kolkata","East COC"), ("BHRGRD","Kolkata","East COC"), ("DALGRD","Kolkata","Kolkata Zone"), ("GUWGRD","Kolkata","East COC"), ("GHTGRD","Kolkata","East COC"), ("HOWGRD","Kolkata","Kolkata Zone"), ("RJHGRD","Kolkata","Kolkata Zone"), ("KOLGRD","Kolkata","Kolkata Zone"), ("SALGRD","Kolkata","Kolkata Zone"), ("SILGRD","Kolkata","East COC"), ("USCGRD","Kolkata","East COC"), ("RAIGRD","Kolkata","East COC"), ("BARGRD","Kolkata","Odisha Zone"), ("ROUGRD","Kolkata","Odisha Zone"), ("JAMGRD","Kolkata","East COC"), ("KONGRD","Kolkata","Kolkata Zone"), ("BHLGRD","NCR","North COC"), ("IDRGRD","NCR","North COC"), ("CP1GRD","NCR","Delhi Zone"), ("CP2GRD","NCR","Delhi Zone"), ("DROGRD","NCR","Delhi Zone"), ("EMBGRD","NCR","Delhi Zone"), ("FRMGRD","NCR","Delhi Zone"), ("PSPGRD","NCR","Delhi Zone"), ("GOLGRD","NCR","Delhi Zone"), ("VVRGRD","NCR","Delhi Zone"), ("USEGRD","NCR","North COC"), ("GHAGRD","NCR","Noida Zone"), ("LKWGRD","NCR","North COC"), ("MRTGRD","NCR","North COC"), ("NDAGRD","NCR","Noida Zone"), ("NDGGRD","NCR","Noida Zone"), ("CHDGRD","NCR","North COC"), ("CROGRD","NCR","North COC"), ("DDNGRD","NCR","North COC"), ("UTKGRD","NCR","North COC"), ("JMUGRD","NCR","North COC"), ("JAUGRD","NCR","North COC"), ("JNKGRD","NCR","North COC"), ("PRWGRD","NCR","North COC"), ("PWNGRD","NCR","North COC"), ("RUDGRD","NCR","North COC"), ("RPRGRD","NCR","North COC"), ("FBDGRD","NCR","Gurgaon Zone"), ("GGNGRD","NCR","Gurgaon Zone"), ("GNBGRD","NCR","Gurgaon Zone"), ("GNSGRD","NCR","Gurgaon Zone"), ("MNSGRD","NCR","Gurgaon Zone"), ("SPTGRD","NCR","North COC"), ("JALGRD","NCR","North COC"), ("LUDGRD","NCR","North COC"), ("JPRGRD","NCR","North COC"), ("DHRGRD","NCR","North COC"), ("JARGRD","NCR","North COC"), ("UDRGRD","NCR","North COC"), ("DUNGRD","NCR","North COC"), ("SNPGRD","NCR","North COC"), ("TYMGRD","NCR","Delhi Zone"), ("TEPGRD","NCR","Noida Zone"), ("OKLGRD","NCR","Delhi Zone"), ("HUBGRD","South","South COC"), ("BELGRD","South","South COC"), ("BANGRD","South","Bangalore Zone"), ("BLRGRD","South","Bangalore Zone"), ("DOMGRD","South","Bangalore Zone"), ("ELEGRD","South","Bangalore Zone"), ("HOOGRD","South","Bangalore Zone"), ("ORRGRD","South","Bangalore Zone"), ("SARGRD","South","Bangalore Zone"), ("VASGRD","South","Bangalore Zone"), ("WHTGRD","South","Bangalore Zone"), ("YELGRD","South","Bangalore Zone"), ("YESGRD","South","Bangalore Zone"), ("MNGGRD","South","South COC"), ("MYOGRD","South","South COC"), ("MYSGRD","South","South COC"), ("HOPGRD","South","Bangalore Zone"), ("COMGRD","South","South COC"), ("CBTGRD","South","South COC"), ("ADYGRD","South","Chennai Zone"), ("ANNGRD","South","Chennai Zone"), ("CHNGRD","South","Chennai Zone"), ("GUIGRD","South","Chennai Zone"), ("MMNGRD","South","Chennai Zone"), ("NUGGRD","South","Chennai Zone"), ("SRIGRD","South","Chennai Zone"), ("COCGRD","South","South COC"), ("PONGRD","South","South COC"), ("MADGRD","South","South COC"), ("TRVGRD","South","South COC"), ("SIRGRD","South","Chennai Zone"), ("SLMGRD","South","South COC"), ("HYDGRD","South","Hyderabad Zone"), ("HYRGRD","South","Hyderabad Zone"), ("HYTGRD","South","Hyderabad Zone"), ("JBHGRD","South","Hyderabad Zone"), ("MHPGRD","South","Hyderabad Zone"), ("VIGGRD","South","South COC"), ("VIZGRD","South","South COC"), ("VJWGRD","South","South COC"), ("VWDGRD","South","South COC"), ("ANPGRD","South","Hyderabad Zone"), ("HSRGRD","South","South COC"), ("AHDGRD","Mumbai","West COC"), ("AHMGRD","Mumbai","West COC"), ("AINGRD","Mumbai","West COC"), ("ANKGRD","Mumbai","West COC"), ("BODGRD","Mumbai","West COC"), ("JNAGRD","Mumbai","West COC"), ("MLDGRD","Mumbai","Mumbai Zone"), ("MNMGRD","Mumbai","Mumbai Zone"), ("MNVGRD","Mumbai","Mumbai Zone"), ("MSOGRD","Mumbai","Mumbai Zone"), ("MUCGRD","Mumbai","Mumbai Zone"), ("MUMGRD","Mumbai","Mumbai Zone"), ("MUSGRD","Mumbai","West COC"), ("GONGRD","Mumbai","West COC"), ("GOAGRD","Mumbai","West COC"), ("NAGGRD","Mumbai","West COC"), ("PROGRD","Mumbai","West COC"), ("PNEGRD","Mumbai","Pune Zone"), ("PNHGRD","Mumbai","Pune Zone"), ("RJGGRD","Mumbai","Pune Zone"), ("PNRGRD","Mumbai","Pune Zone"), ("PUWGRD","Mumbai","Pune Zone"), ("PUNGRD","Mumbai","Pune Zone"), ("DEUGRD","Mumbai","West COC"), ("PNIGRD","Mumbai","Pune Zone"), ("MONGRD","Mumbai","Mumbai Zone"), ("MUSMSP","Mumbai","Mumbai Zone"), ("CORMSP","Mumbai","Mumbai Zone"), ("INVGRD","HeadOffice","Head Office"), ("OTHGRD","HeadOffice","Head Office"), ("PSOGRD","HeadOffice","Head Office"), ("TRGGRD","HeadOffice","Head Office"), ("CORGRD","HeadOffice","Head Office"), ("HO","HeadOffice","Head Office"), ("HIMGRD","NCR","North COC") ]
-
-        hub_zone = pd.DataFrame(
-            hub_zone_data,
-            columns=["Location","HUB","Zone"]
-        )
-
-        hub_zone["Location"] = normalize_order(hub_zone["Location"])
-        pillar["Location"] = normalize_order(pillar["Location"])
-
-        pillar = pillar.merge(
-            hub_zone,
-            on="Location",
-            how="left"
-        )
-
-        log_container.write("Owner mapping...")
-
-        owner_map["billing_location"] = (
-            owner_map["billing_location"]
-            .astype(str)
-            .str.strip()
-            .str.replace(" ", "", regex=False)
-            .str.upper()
-        )
-
-        pillar["Location"] = (
-            pillar["Location"]
-            .astype(str)
-            .str.strip()
-            .str.replace(" ", "", regex=False)
-            .str.upper()
-        )
-
-        owner_map["cust_no"] = (
-            owner_map["cust_no"]
-            .astype(str)
-            .str.strip()
-            .str.replace(".0", "", regex=False)
-            .str.upper()
-        )
-
-        pillar["Customer Code"] = (
-            pillar["Customer Code"]
-            .astype(str)
-            .str.strip()
-            .str.replace(".0", "", regex=False)
-            .str.upper()
-        )
-
-        pillar["Key"] = pillar["Location"] + "_" + pillar["Customer Code"]
-        owner_map["Key"] = owner_map["billing_location"] + "_" + owner_map["cust_no"]
-        owner_map = owner_map.drop_duplicates(subset="Key", keep="last")
-
-        pillar = pillar.merge(
-            owner_map[["Key", "branch_finance_lead"]],
-            on="Key",
-            how="left"
-        )
-
-        pillar = pillar.rename(columns={"branch_finance_lead": "Owner"})
-
-        log_container.write("Creating pivot...")
-
-        pivot = (
-            pillar.groupby([
-                "HUB","Location","Zone","Owner",
-                "Customer Code","Customer Name",
-                "Order No","Invoice No","WF_TaskID",
-                "Period From","Period To"
-            ], dropna=False)[
-                ["Total Attendance","Performed Hrs","Billed Hrs"]
-            ]
-            .sum()
-            .reset_index()
-        )
-
-        pivot = pivot.rename(columns={
-            "Performed Hrs":"Total Performed",
-            "Billed Hrs":"Total Billed"
-        })
-
-        pivot["Var. Performed Vs. Billed"] = (
-            pivot["Total Billed"] - pivot["Total Performed"]
+        if job.discarded:
+            # Replaced by a newer run of its session: nobody will download it.
+            return None
+
+        job.log("Writing outputs...")
+
+        output_dir = tempfile.mkdtemp(prefix="hours_recon_")
+        job.add_cleanup(lambda: shutil.rmtree(output_dir, ignore_errors=True))
+        try:
+            output_paths = write_outputs(india_conso, formats, output_dir, profiler=profiler)
+        except Exception:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise
+
+        if history_period:
+            job.log(f"Saving period {history_period} to history...")
+            with profiler.stage("history", rows_in=india_conso) as record:
+                save_period(india_conso, history_period)
+                record["rows_out"] = len(india_conso)
+
+        job.log("Indexing results for the explorer...")
+        with profiler.stage("explorer", rows_in=india_conso) as record:
+            explorer = PivotExplorer(india_conso)
+            record["rows_out"] = len(explorer)
+
+    return {
+        "output_dir": output_dir,
+        "output_paths": output_paths,
+        "engines": engines,
+        "hub_zone_version": hub_zone_table().version,
+        "profiler": profiler,
+        "whole_run": whole_run,
+        "explorer": explorer,
+    }
+
+
+def _read_output(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def show_result(job):
+    result = job.result
+    profiler = result["profiler"]
+
+    st.caption(
+        "Read with: " + ", ".join(f"{role} → {engine}" for role, engine in result["engines"].items())
+    )
+    reused = [r["stage"] for r in profiler.records if r["reused"]]
+    st.caption(
+        "Reused from previous run: " + (", ".join(reused) if reused else "none")
+    )
+    st.dataframe(profiler.table(), hide_index=True)
+
+    timing_col, profile_report_col = st.columns(2)
+    timing_col.download_button(
+        "⏱️ Download stage timings (JSON)",
+        data=profiler.to_json(
+            engines=result["engines"],
+            hub_zone_version=result["hub_zone_version"],
+            job_id=job.id
+        ),
+        file_name="Hours_Recon_Profile.json",
+        mime="application/json"
+    )
+    whole_run = result["whole_run"]
+    if whole_run["report"]:
+        is_html = whole_run["format"] == "html"
+        profile_report_col.download_button(
+            "🔬 Download full-run profile",
+            data=whole_run["report"],
+            file_name="Hours_Recon_Profile." + ("html" if is_html else "txt"),
+            mime="text/html" if is_html else "text/plain"
         )
 
-        pivot["Office Duty/Office Patrolling"] = np.where(
-            pivot["Customer Code"].astype(str) == "7401",
-            pivot["Total Performed"],
-            ""
+    st.success(f"Processing complete ✅ ({job.seconds:.1f}s)")
+
+    for fmt, path in result["output_paths"].items():
+        file_name, mime = OUTPUT_FORMATS[fmt]
+        # Read on click only: this fragment reruns on every explorer change.
+        st.download_button(
+            f"📥 Download {file_name}",
+            data=lambda path=path: _read_output(path),
+            file_name=file_name,
+            mime=mime,
+            key=f"download_{fmt}"
         )
 
-        extra_cols = [ "Excess Paid", "Reliever duty", "Excess billing", "Short billing", "Disciplinary Deduction", "Short / Missing Roster", "Inter assignment adjustment", "Indirect Hours Not Captured in Saturn", "Training & OJT", "Complimentary Hrs.", "Billing Cycle/ hours calculation other than calendar month", "Bill Hrs should being Cycle", "Diff with bill cycle should be", "Total ( B )", "Check (A - B)", "BFL Remarks", "SSC Query (If Any)" ]
-
-        for col in extra_cols:
-            pivot[col] = pd.NA
-        pivot = pivot[[ "HUB", "Location", "Zone", "Owner", "Customer Code", "Customer Name", "Order No", "Invoice No", "WF_TaskID", "Period From", "Period To", "Total Attendance", "Total Performed", "Total Billed", "Var. Performed Vs. Billed", "Office Duty/Office Patrolling", "Excess Paid", "Reliever duty", "Excess billing", "Short billing", "Disciplinary Deduction", "Short / Missing Roster", "Inter assignment adjustment", "Indirect Hours Not Captured in Saturn", "Training & OJT", "Complimentary Hrs.", "Billing Cycle/ hours calculation other than calendar month", "Bill Hrs should being Cycle", "Diff with bill cycle should be", "Total ( B )", "Check (A - B)", "BFL Remarks", "SSC Query (If Any)" ]]
-
-        pivot["Inter assignment adjustment"] = pd.NA
-        pivot["Var. Performed Vs. Billed"] = pd.to_numeric( pivot["Var. Performed Vs. Billed"], errors="coerce" )
-
-        seen = {}
-        for idx, row in pivot.iterrows():
-            order = str(row["Order No"]).strip()
-            val = pd.to_numeric(row["Var. Performed Vs. Billed"], errors="coerce")
-
-            if pd.isna(val) or val == 0:
-                continue
-
-            key = (order, round(val, 6))
-            reverse_key = (order, round(-val, 6))
-
-            if reverse_key in seen:
-                prev_idx = seen[reverse_key]
-                pivot.loc[idx, "Inter assignment adjustment"] = -val
-                pivot.loc[prev_idx, "Inter assignment adjustment"] = -pivot.loc[prev_idx, "Var. Performed Vs. Billed"]
-                del seen[reverse_key]
-            else:
-                seen[key] = idx
-
-        india_conso = pivot.copy()
-
-        log_container.write("Preparing Excel output...")
+    show_explorer(job.id, result["explorer"])
+
+
+def show_explorer(job_id, explorer):
+    """Roll-ups and rows of the result, one page at a time."""
+    st.markdown("### 🔎 Explore Results")
+
+    by_col, sort_col, descending_col = st.columns([3, 2, 1])
+    by = by_col.multiselect(
+        "Group by (none: show rows)", DIMENSIONS, default=["Zone"], key=f"explore_by_{job_id}"
+    )
+    sort_by = sort_col.selectbox(
+        "Sort by", [None] + by + MEASURES + ["Rows"] if by else [None] + DIMENSIONS + MEASURES,
+        format_func=lambda c: "(none)" if c is None else c, key=f"explore_sort_{job_id}"
+    )
+    descending = descending_col.checkbox("Descending", value=True, key=f"explore_desc_{job_id}")
+
+    filters = {}
+    filter_cols = st.columns(4)
+    for col, dim in zip(filter_cols, ["HUB", "Zone", "Owner"]):
+        chosen = col.multiselect(dim, explorer.values(dim), key=f"explore_{dim}_{job_id}")
+        if chosen:
+            filters[dim] = chosen
+    order_no = filter_cols[3].text_input("Order No", key=f"explore_order_{job_id}")
+    if order_no.strip():
+        # Matched against the pivot's order numbers, which are normalized the same way.
+        filters["Order No"] = normalize_order(pd.Series([order_no])).iloc[0]
+
+    number = st.number_input("Page", min_value=1, value=1, key=f"explore_page_{job_id}") - 1
+    if by:
+        rollup = explorer.rollup(by, filters)
+        if sort_by is not None:
+            rollup = rollup.sort_values(sort_by, ascending=not descending, kind="stable", ignore_index=True)
+        shown, total = page(rollup, number)
+    else:
+        shown, total = explorer.rows(filters, sort_by, not descending, number)
+    pages = max(1, -(-total // PAGE_SIZE))
+    st.caption(f"{total:,} {'groups' if by else 'rows'} · page {number + 1} of {pages}")
+    st.dataframe(shown, hide_index=True)
+
+
+def show_validation_errors(job):
+    report = job.exception.report
+    st.error(f"The input files have {len(report.errors)} problem(s); nothing was processed.")
+    st.dataframe(report.table(), hide_index=True)
+
+    # One suggestion for the whole report, asked for once per job.
+    suggestion_key = f"fix_suggestion_{job.id}"
+    if suggestion_key not in st.session_state:
+        with st.spinner("Asking for a fix suggestion..."):
+            st.session_state[suggestion_key] = fix_suggestion(report)
+    with st.expander("💡 How to fix", expanded=True):
+        st.markdown(st.session_state[suggestion_key])
+
+
+def show_job(job_id):
+    """Progress and result of this session's job; polled while it is unfinished."""
+    manager = default_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        st.session_state.pop("job_id", None)
+        return
+
+    for msg in list(job.messages):
+        st.write(msg)
+
+    if job.status == "queued":
+        st.info(f"Job {job.id} is queued ({manager.jobs_ahead(job)} ahead, {manager.max_workers} run at a time)...")
+    elif job.status == "running":
+        st.info(f"Job {job.id} running for {job.seconds:.0f}s...")
+    elif not st.session_state.get("job_final"):
+        # Finished while polling: rerun the page once to stop the polling.
+        st.session_state["job_final"] = True
+        st.rerun()
+    elif isinstance(job.exception, ValidationError):
+        show_validation_errors(job)
+    elif job.status == "failed":
+        st.error(f"Processing failed: {job.error}")
+    else:
+        show_result(job)
 
-        output = BytesIO()
 
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+if run:
 
-            india_conso.to_excel(writer, sheet_name="India Conso", index=False)
+    if not output_labels:
+        st.warning("Please choose at least one output format.")
 
-            for hub in india_conso["HUB"].dropna().unique():
-                india_conso[india_conso["HUB"] == hub].to_excel(
-                    writer,
-                    sheet_name=str(hub)[:31],
-                    index=False
-                )
+    elif history_period and not PERIOD_LABEL.fullmatch(history_period):
+        st.warning("The history period may only contain letters, digits, '-', '_' and '.'.")
 
-        log_container.success("Processing complete ✅")
+    elif uploaded_file_dump and uploaded_file_pillar and uploaded_file_owner and uploaded_file_attendance:
 
+        # Only keep the latest job of this session: dropping the previous one
+        # frees its result and deletes its output files.
+        previous_job_id = st.session_state.pop("job_id", None)
+        if previous_job_id:
+            default_job_manager().discard(previous_job_id)
 
-        log_container.download_button(
-            "📥 Download Reconciliation Report",
-            data=output.getvalue(),
-            file_name="Hours_Recon_Output.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        files = [
+            UploadSnapshot(f) for f in (
+                uploaded_file_dump,
+                uploaded_file_pillar,
+                uploaded_file_owner,
+                uploaded_file_attendance,
+            )
+        ]
+        job = default_job_manager().submit(
+            run_reconciliation,
+            files,
+            None if profile_mode == "Off" else profile_mode.lower(),
+            backend,
+            low_memory,
+            [OUTPUT_LABELS[label] for label in output_labels],
+            history_period,
         )
+        st.session_state["job_id"] = job.id
+        st.session_state["job_final"] = False
 
     else:
         st.warning("Please upload all required files.")
+
+# The job outlives reruns triggered by other widgets; its ID is in the session.
+if "job_id" in st.session_state:
+    active_job = default_job_manager().get(st.session_state["job_id"])
+    with log_container:
+        st.fragment(show_job, run_every=None if active_job is None or active_job.done else 1)(
+            st.session_state["job_id"]
+        )
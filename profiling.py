@@ -0,0 +1,140 @@
+"""
+Lightweight per-stage profiling for the reconciliation pipeline.
+
+``Profiler.stage`` wraps one step and records wall time, growth of the
+process' peak RSS and the row counts going in and out. The records can be
+shown as a table, dumped as JSON, or complemented by a whole-run cProfile
+(or pyinstrument, when installed) report via ``profile_run``.
+"""
+import cProfile
+import io
+import json
+import platform
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if unknown."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes.
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss)
+
+
+def _rows(obj):
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+class Profiler:
+    """Collects one record per pipeline stage."""
+
+    def __init__(self):
+        self.records = []
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Time the enclosed block as stage ``name``.
+
+        Yields the record dict; callers set ``rows_out`` (or ``reused``) on
+        it before the block ends. ``rows_in`` may be a count or a frame.
+        """
+        record = {
+            "stage": name,
+            "reused": False,
+            "seconds": None,
+            "peak_rss_delta_mb": None,
+            "rows_in": rows_in if rows_in is None or isinstance(rows_in, int) else _rows(rows_in),
+            "rows_out": None,
+        }
+        rss_before = peak_rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            rss_after = peak_rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                record["peak_rss_delta_mb"] = (rss_after - rss_before) / (1024 * 1024)
+            if record["rows_out"] is not None and not isinstance(record["rows_out"], int):
+                record["rows_out"] = _rows(record["rows_out"])
+            self.records.append(record)
+
+    def table(self):
+        """Records as a DataFrame, rounded for display."""
+        import pandas as pd
+        df = pd.DataFrame(self.records)
+        if not df.empty:
+            df["seconds"] = df["seconds"].round(3)
+            df["peak_rss_delta_mb"] = df["peak_rss_delta_mb"].round(1)
+        return df
+
+    def to_json(self, **extra):
+        """Records plus run metadata as a JSON string."""
+        return json.dumps({
+            "started_at": self.started_at,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "total_seconds": sum(r["seconds"] or 0 for r in self.records),
+            **extra,
+            "stages": self.records,
+        }, indent=2, default=str)
+
+
+@contextmanager
+def profile_run(mode=None):
+    """
+    Profile the enclosed block as a whole.
+
+    ``mode`` is None (disabled), "cprofile" or "pyinstrument". Yields a dict
+    whose "report" key holds the text report once the block exits, and
+    "format" its kind ("text" or "html").
+    """
+    result = {"report": None, "format": "text"}
+    if mode is None:
+        yield result
+        return
+
+    if mode == "pyinstrument":
+        from pyinstrument import Profiler as _Pyinstrument
+        profiler = _Pyinstrument()
+        profiler.start()
+        try:
+            yield result
+        finally:
+            profiler.stop()
+            result["report"] = profiler.output_html()
+            result["format"] = "html"
+        return
+
+    if mode != "cprofile":
+        raise ValueError(f"Unknown profile mode: {mode}")
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        result["report"] = out.getvalue()
@@ -0,0 +1,748 @@
+"""
+Headless reconciliation engine for the Hours Recon tool.
+
+Everything in here is free of Streamlit so the same pipeline can be driven
+from the web app, the command line (cli.py) or a notebook.
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from cache import cache_key, file_digest
+from ingest import iter_file_chunks, read_file_with_engine
+from keys import intern, intern_combined, lookup_positions, take
+from profiling import Profiler
+from reference import load_reference
+
+
+# =========================
+# EXPECTED INPUT COLUMNS
+# =========================
+DUMP_COLS = ["Order No", "Period From", "Period To", "Invoice dt"]
+
+PILLAR_COLS = [
+    "Location", "Customer Code", "Customer Name", "Order No", "Invoice No",
+    "SO Line No", "No of Post", "Deployment Hrs", "WF_TaskID",
+    "Performed Hrs", "Billed Hrs", "Billed Vs Performed",
+    "Contracted Vs Performed", "Billing Pattern",
+    "ERP Cont Hrs", "Saturn Cont Hrs", "Scheduled Hrs",
+]
+
+PIVOT_KEYS = [
+    "HUB", "Location", "Zone", "Owner",
+    "Customer Code", "Customer Name",
+    "Order No", "Invoice No", "WF_TaskID",
+    "Period From", "Period To",
+]
+
+# Summed per PIVOT_KEYS group.
+PIVOT_SUMS = ["Total Attendance", "Performed Hrs", "Billed Hrs"]
+
+EXTRA_COLS = [
+    "Excess Paid", "Reliever duty", "Excess billing", "Short billing",
+    "Disciplinary Deduction", "Short / Missing Roster",
+    "Inter assignment adjustment", "Indirect Hours Not Captured in Saturn",
+    "Training & OJT", "Complimentary Hrs.",
+    "Billing Cycle/ hours calculation other than calendar month",
+    "Bill Hrs should being Cycle", "Diff with bill cycle should be",
+    "Total ( B )", "Check (A - B)", "BFL Remarks", "SSC Query (If Any)",
+]
+
+OUTPUT_COLS = PIVOT_KEYS + [
+    "Total Attendance", "Total Performed", "Total Billed",
+    "Var. Performed Vs. Billed", "Office Duty/Office Patrolling",
+] + EXTRA_COLS
+
+# =========================
+# HUB ZONE DATA
+# =========================
+# Location -> HUB, Zone. Edit the file to change the mapping; running
+# processes pick the change up on their next run (see reference.py).
+HUB_ZONE_FILE = os.environ.get(
+    "HOURS_RECON_HUB_ZONE_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference", "hub_zone.csv"),
+)
+
+
+def hub_zone_table():
+    """The HUB/Zone mapping as a ``reference.ReferenceTable`` keyed on normalized Location."""
+    return load_reference(HUB_ZONE_FILE, "Location", normalize=normalize_order)
+
+
+# =========================
+# FILE LOADING
+# =========================
+INPUT_READ_ARGS = {
+    "dump": {"header": 2, "usecols": DUMP_COLS},
+    "pillar": {"header": 2, "usecols": PILLAR_COLS},
+    "owner_map": {},
+    "attendance": {"header": 2},
+}
+
+
+def load_clean_inputs(dump_file, pillar_file, owner_file, attendance_file, cache=None, engines=None,
+                      keys=None, profiler=None):
+    """
+    Read and clean the four uploads, reusing ``cache`` for unchanged files.
+
+    ``cache`` is a ``cache.FrameCache``; pass None to always parse. If an
+    ``engines`` dict is given it is filled with the ingestion engine that
+    handled each role ("cache" for cache hits), and a ``keys`` dict with each
+    file's content key for ``run_stages``. Each file is recorded as a
+    "read:<role>" stage on ``profiler`` when one is given. Returns the frames
+    ready for ``reconcile(..., cleaned=True)``. A file passed as None (the
+    pillar, when it is streamed with ``iter_pillar_chunks``) is skipped.
+    """
+    files = {
+        "dump": dump_file,
+        "pillar": pillar_file,
+        "owner_map": owner_file,
+        "attendance": attendance_file,
+    }
+    engines = {} if engines is None else engines
+    keys = {} if keys is None else keys
+    profiler = profiler or Profiler()
+    frames = {}
+    for role, f in files.items():
+        if f is None:
+            continue
+        read_args = INPUT_READ_ARGS[role]
+        parsed = []
+
+        def parse(f=f, role=role, read_args=read_args):
+            df, engines[role] = read_file_with_engine(f, **read_args)
+            parsed.append(len(df))
+            return CLEANERS[role](df)
+
+        with profiler.stage(f"read:{role}") as record:
+            keys[role] = cache_key(file_digest(f), role=role, **read_args)
+            if cache is None:
+                frames[role] = parse()
+            else:
+                engines[role] = "cache"
+                frames[role] = cache.get_or_parse(keys[role], parse)
+            record["reused"] = not parsed
+            record["rows_in"] = parsed[0] if parsed else None
+            record["rows_out"] = frames[role]
+    return frames
+
+
+# =========================
+# NORMALIZATION HELPERS
+# =========================
+def normalize_order(s):
+    return (
+        s.astype(str)
+        .str.strip()
+        .str.replace(" ", "", regex=False)
+        .str.upper()
+    )
+
+
+def normalize_code(s):
+    return (
+        s.astype(str)
+        .str.strip()
+        .str.replace(".0", "", regex=False)
+        .str.upper()
+    )
+
+
+def normalize_so_line(s):
+    return (
+        s.astype(str)
+        .str.replace(".0", "", regex=False)
+        .str.strip()
+    )
+
+
+def normalize_attendance_col(col):
+    if not isinstance(col, str):
+        return col
+    nums = re.findall(r"\d+", col)
+    if len(nums) == 2:
+        return f"{int(nums[0])}-{int(nums[1])}"
+    return col
+
+
+def normalize_attendance_row_label(s):
+    return (
+        s.astype(str)
+        .str.upper()
+        .str.strip()
+        .str.replace(" ", "", regex=False)
+        .str.replace("-", "", regex=False)
+    )
+
+
+def _strip_object_cols(df):
+    str_cols = df.select_dtypes(include="object").columns
+    df[str_cols] = df[str_cols].apply(lambda col: col.str.strip())
+    return df
+
+
+def parse_dates(s):
+    """
+    ``pd.to_datetime(s, errors="coerce")``, parsing each distinct value once.
+
+    Dump dates repeat heavily (one per billing period), so the distinct
+    values are parsed and mapped back through the codes.
+    """
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return pd.to_datetime(s, errors="coerce")
+    codes, uniques = pd.factorize(s)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors="coerce")
+    return pd.Series(take(parsed, codes), index=s.index, name=s.name)
+
+
+# =========================
+# PER-FILE CLEANING
+# =========================
+def clean_dump(dump):
+    dump = _strip_object_cols(dump.copy())
+
+    dump["Order No"] = intern(dump["Order No"], normalize_order)
+
+    dump["Period From"] = parse_dates(dump["Period From"])
+    dump["Period To"] = parse_dates(dump["Period To"])
+    dump["Invoice dt"] = parse_dates(dump["Invoice dt"])
+    return dump
+
+
+def clean_pillar(pillar):
+    pillar = pillar[pillar["Performed Hrs"] + pillar["Billed Hrs"] > 0].copy()
+    pillar = _strip_object_cols(pillar)
+
+    pillar["Order No"] = intern(pillar["Order No"], normalize_order)
+    pillar["Location"] = intern(pillar["Location"], normalize_order)
+    pillar["Customer Code"] = intern(pillar["Customer Code"], normalize_code)
+    pillar["SO Line No"] = intern(pillar["SO Line No"], normalize_so_line)
+    return pillar
+
+
+def clean_owner_map(owner_map):
+    owner_map = owner_map.copy()
+    owner_map.columns = owner_map.columns.str.strip().str.lower().str.replace(" ", "_")
+
+    owner_map["billing_location"] = normalize_order(owner_map["billing_location"])
+    owner_map["cust_no"] = normalize_code(owner_map["cust_no"])
+
+    owner_map["Key"] = owner_map["billing_location"] + "_" + owner_map["cust_no"]
+    return owner_map.drop_duplicates(subset="Key", keep="last")
+
+
+def clean_attendance(attendance):
+    attendance = attendance.copy()
+    attendance.columns = [normalize_attendance_col(c) for c in attendance.columns]
+    # Date-range values that are not numbers are ignored, as validation warns.
+    for i, col in enumerate(attendance.columns):
+        values = attendance.iloc[:, i]
+        if isinstance(col, str) and DATE_RANGE_COL.fullmatch(col) and not pd.api.types.is_numeric_dtype(values):
+            attendance.isetitem(i, pd.to_numeric(values, errors="coerce"))
+    attendance["row_key"] = normalize_attendance_row_label(attendance["Row Labels"])
+    return attendance
+
+
+CLEANERS = {
+    "dump": clean_dump,
+    "pillar": clean_pillar,
+    "owner_map": clean_owner_map,
+    "attendance": clean_attendance,
+}
+
+
+def _noop(msg):
+    pass
+
+
+# Latest first by these dates, in priority order; NaT counts as earliest.
+LATEST_INVOICE_ORDER = ["Invoice dt", "Period To", "Period From"]
+
+# Date_Range label of each day pair (from day * 32 + to day); missing when
+# either day is (0).
+DATE_RANGE_LABELS = np.array(
+    [f"{d_from}-{d_to}" if d_from and d_to else np.nan for d_from in range(32) for d_to in range(32)],
+    dtype=object,
+)
+
+
+def _latest_first_rank(dump):
+    """Per row, its rank in LATEST_INVOICE_ORDER, latest first (equal dates: equal rank)."""
+    rank = np.zeros(len(dump), dtype=np.int64)
+    bound = 1
+    for col in LATEST_INVOICE_ORDER:
+        # ~x on the int64 dates sorts latest first; NaT (int64 min) becomes
+        # the largest key and sorts last, as sort_values(ascending=False) does.
+        col_rank, uniques = pd.factorize(~dump[col].to_numpy().view(np.int64), sort=True)
+        if bound * len(uniques) >= 2 ** 62:
+            rank, seen = pd.factorize(rank, sort=True)
+            bound = len(seen)
+        rank = rank * len(uniques) + col_rank
+        bound *= max(len(uniques), 1)
+    return rank
+
+
+# Billing period labels: a month, as "2024-03".
+PERIOD_MONTH = re.compile(r"\d{4}-\d{2}")
+
+
+def dump_as_of(dump, period):
+    """
+    The rows of a cleaned ``dump`` billed up to ``period`` ("2024-03"):
+    Period To (else Period From) in that month or before, plus the undated
+    rows.
+
+    ``first_invoice_per_order`` over them picks each Order No's latest
+    invoice as of that period, as the period's own dump would, from a dump
+    exported over several months.
+    """
+    dated = dump["Period To"].fillna(dump["Period From"]).to_numpy(dtype="datetime64[ns]")
+    months = dated.astype("datetime64[M]")
+    return dump[np.isnat(months) | (months <= np.datetime64(period, "M"))]
+
+
+# =========================
+# PIPELINE STAGES
+# =========================
+# Every stage returns a new frame and leaves its inputs untouched, so stage
+# results can be memoized and shared between runs.
+def first_invoice_per_order(dump):
+    """
+    Keep the latest invoice (then period) per Order No and build its Date_Range.
+
+    A grouped argmin over one int64 rank of the three dates picks each
+    order's latest row in a single pass, ties keeping the first row in file
+    order. Only the chosen rows are then sorted latest first, the order
+    ``sort_values`` + ``drop_duplicates`` left them in.
+    """
+    order_codes = pd.factorize(dump["Order No"])[0] + 1  # 0: missing Order No
+    rank = _latest_first_rank(dump)
+
+    best = np.full(order_codes.max(initial=0) + 1, np.iinfo(np.int64).max)
+    np.minimum.at(best, order_codes, rank)
+    candidates = np.flatnonzero(rank == best[order_codes])
+    first = np.full(len(best), -1)
+    first[order_codes[candidates[::-1]]] = candidates[::-1]
+    chosen = np.sort(first[first >= 0])
+    dump_first = dump.take(chosen[np.argsort(rank[chosen], kind="stable")])
+
+    day_pair = (
+        dump_first["Period From"].dt.day.fillna(0).to_numpy(dtype=np.int64) * 32
+        + dump_first["Period To"].dt.day.fillna(0).to_numpy(dtype=np.int64)
+    )
+    dump_first["Date_Range"] = intern(
+        pd.Series(day_pair, index=dump_first.index),
+        lambda days: pd.Series(DATE_RANGE_LABELS[days.to_numpy()]),
+    )
+    return dump_first
+
+
+def attach_invoice_period(pillar, dump_first):
+    """Left-join the latest invoice period per Order No, as an index lookup."""
+    positions = lookup_positions(dump_first["Order No"], pillar["Order No"])
+    return pillar.assign(**{
+        col: take(dump_first[col], positions)
+        for col in ["Period From", "Period To", "Date_Range"]
+    })
+
+
+DATE_RANGE_COL = re.compile(r"\d+-\d+")
+
+
+def _group_positions(keys, lookup):
+    """
+    For each value in ``lookup``, locate its occurrences in ``keys``.
+
+    Returns ``(positions, start, count)``: the occurrences of ``lookup[i]``
+    are ``positions[start[i]:start[i] + count[i]]`` in their original order;
+    ``count`` is 0 where the value does not occur.
+    """
+    codes, uniques = pd.factorize(pd.Index(keys), use_na_sentinel=False)
+    positions = np.argsort(codes, kind="stable")
+    group_count = np.bincount(codes, minlength=len(uniques))
+    group_start = np.concatenate([[0], np.cumsum(group_count)[:-1]])
+
+    found = lookup_positions(uniques, lookup)
+    hit = found >= 0
+    start = np.zeros(len(found), dtype=np.int64)
+    count = np.zeros(len(found), dtype=np.int64)
+    start[hit] = group_start[found[hit]]
+    count[hit] = group_count[found[hit]]
+    return positions, start, count
+
+
+def attach_attendance(pillar, attendance):
+    """
+    Look up each pillar row's attendance at (row_key, Date_Range).
+
+    Equivalent to melting the attendance pivot to long form and left-merging
+    it, without building the long table: only the date-range columns are
+    kept and each pillar row resolves to a row and column position in the
+    wide matrix. Repeated row labels or date ranges yield one output row per
+    match, in the order the melt + merge produced them.
+    """
+    row_key = intern_combined(
+        [pillar["Order No"], pillar["SO Line No"]],
+        lambda u: u["Order No"].astype(str).str.strip() + u["SO Line No"].astype(str).str.strip(),
+    )
+    columns = attendance.iloc[:, [
+        i for i, c in enumerate(attendance.columns)
+        if isinstance(c, str) and c != "row_key" and DATE_RANGE_COL.fullmatch(c)
+    ]]
+    date_cols = list(columns.columns)
+
+    row_pos, row_start, row_count = _group_positions(attendance["row_key"], row_key)
+    col_pos, col_start, col_count = _group_positions(date_cols, pillar["Date_Range"])
+
+    matches = row_count * col_count
+    out_rows = np.maximum(matches, 1)
+    if (out_rows == 1).all():
+        source = np.arange(len(pillar))
+        offset = np.zeros(len(pillar), dtype=np.int64)
+    else:
+        source = np.repeat(np.arange(len(pillar)), out_rows)
+        offset = np.arange(len(source)) - np.repeat(np.cumsum(out_rows) - out_rows, out_rows)
+
+    hit = matches[source] > 0
+    src_hit = source[hit]
+    # Melt order is column-major: every row of the first matching column,
+    # then every row of the next one.
+    n_rows = row_count[src_hit]
+    att_row = row_pos[row_start[src_hit] + offset[hit] % n_rows]
+    att_col = col_pos[col_start[src_hit] + offset[hit] // n_rows]
+
+    numeric = all(pd.api.types.is_numeric_dtype(dtype) for dtype in columns.dtypes)
+    values = np.full(len(source), np.nan, dtype="float64" if numeric else "object")
+    hit_idx = np.flatnonzero(hit)
+    for col in np.unique(att_col):
+        in_col = att_col == col
+        values[hit_idx[in_col]] = columns.iloc[:, col].to_numpy()[att_row[in_col]]
+
+    if len(source) != len(pillar):
+        pillar = pillar.take(source).reset_index(drop=True)
+    return pillar.assign(**{"Total Attendance": values})
+
+
+def attach_hub_zone(pillar, hub_zone=None):
+    """Add HUB and Zone from ``hub_zone`` (default: ``hub_zone_table()``)."""
+    if hub_zone is None:
+        hub_zone = hub_zone_table()
+    # Locations are unique, so a left merge is a plain lookup.
+    return pillar.assign(**hub_zone.lookup(pillar["Location"], ["HUB", "Zone"]))
+
+
+def attach_owner(pillar, owner_map):
+    key = intern_combined(
+        [pillar["Location"], pillar["Customer Code"]],
+        lambda u: u["Location"] + "_" + u["Customer Code"],
+    )
+    positions = lookup_positions(owner_map["Key"], key)
+    return pillar.assign(Owner=take(intern(owner_map["branch_finance_lead"]), positions))
+
+
+def sum_by_pivot_keys(pillar):
+    """
+    Sum the hours columns per PIVOT_KEYS group.
+
+    The result keeps the PIVOT_SUMS column names, so partial results (one
+    per pillar chunk) can be concatenated and summed again.
+    """
+    return (
+        pillar.groupby(PIVOT_KEYS, dropna=False, observed=True)[PIVOT_SUMS]
+        .sum()
+        .reset_index()
+    )
+
+
+def aggregate_pivot(pillar):
+    """Aggregate the enriched pillar rows into the India Conso layout."""
+    return pivot_layout(sum_by_pivot_keys(pillar))
+
+
+def pivot_layout(sums):
+    """Turn ``sum_by_pivot_keys`` output into the India Conso columns."""
+    pivot = sums.rename(columns={
+        "Performed Hrs": "Total Performed",
+        "Billed Hrs": "Total Billed"
+    })
+
+    pivot["Var. Performed Vs. Billed"] = (
+        pivot["Total Billed"] - pivot["Total Performed"]
+    )
+
+    # Hours are read as float64; whole-number totals keep the form the
+    # inferred int64 column gave them here ("816", not "816.0").
+    performed = pivot["Total Performed"]
+    if performed.notna().all() and (performed % 1 == 0).all():
+        performed = performed.astype("int64")
+    pivot["Office Duty/Office Patrolling"] = np.where(
+        pivot["Customer Code"].astype(str) == "7401",
+        performed,
+        ""
+    )
+
+    for col in EXTRA_COLS:
+        pivot[col] = pd.NA
+    pivot = pivot[OUTPUT_COLS]
+
+    pivot["Var. Performed Vs. Billed"] = pd.to_numeric(pivot["Var. Performed Vs. Billed"], errors="coerce")
+    return pivot
+
+
+def apply_adjustments(pivot):
+    pivot = pivot.copy()
+    pivot["Inter assignment adjustment"] = inter_assignment_adjustment(pivot)
+    return pivot
+
+
+# (name, function, inputs, progress message). Inputs name either one of the
+# four cleaned files (dump, pillar, owner_map, attendance), the hub_zone
+# reference table or an earlier stage.
+STAGES = [
+    ("dump_first", first_invoice_per_order, ["dump"], None),
+    ("pillar_enrichment", attach_invoice_period, ["pillar", "dump_first"], None),
+    ("attendance_merge", attach_attendance, ["pillar_enrichment", "attendance"], "Processing attendance..."),
+    ("hub_zone_merge", attach_hub_zone, ["attendance_merge", "hub_zone"], "Creating HUB Zone mapping..."),
+    ("owner_merge", attach_owner, ["hub_zone_merge", "owner_map"], "Owner mapping..."),
+    ("pivot", aggregate_pivot, ["owner_merge"], "Creating pivot..."),
+    ("adjustments", apply_adjustments, ["pivot"], None),
+]
+
+
+def run_stages(frames, keys=None, memo=None, log=None, profiler=None):
+    """
+    Run ``STAGES`` over the four cleaned ``frames`` and return ``(pivot, records)``.
+
+    ``keys`` maps each input file role to a content key (see
+    ``load_clean_inputs``). With a ``memo`` (a ``cache.FrameCache``) each
+    stage result is stored under a hash of its name and its inputs' keys, so
+    when only one file changes just the stages downstream of it run again.
+    Each stage is timed with ``profiler`` (a new ``profiling.Profiler`` if
+    None); ``records`` are its per-stage records.
+    """
+    log = log or _noop
+    profiler = profiler or Profiler()
+    results = dict(frames)
+    keys = dict(keys or {})
+    # The reference table is an input like the files, keyed on its version.
+    results.setdefault("hub_zone", hub_zone_table())
+    keys.setdefault("hub_zone", results["hub_zone"].version)
+
+    for name, func, inputs, message in STAGES:
+        if message:
+            log(message)
+
+        with profiler.stage(name, rows_in=results[inputs[0]]) as record:
+            result = None
+            key = None
+            if memo is not None and all(i in keys for i in inputs):
+                key = cache_key(name, inputs=[keys[i] for i in inputs])
+                keys[name] = key
+                result = memo.get(key)
+
+            record["reused"] = result is not None
+            if result is None:
+                result = func(*[results[i] for i in inputs])
+                if key is not None:
+                    memo.put(key, result)
+
+            results[name] = result
+            record["rows_out"] = result
+
+    return results[STAGES[-1][0]], profiler.records
+
+
+# =========================
+# RECONCILIATION
+# =========================
+def reconcile(dump, pillar, owner_map, attendance, log=None, cleaned=False, profiler=None):
+    """
+    Run the full hours reconciliation and return the India Conso pivot.
+
+    The input frames are raw reads (``ingest.read_file`` with
+    ``INPUT_READ_ARGS``), or the output of ``load_clean_inputs`` when
+    ``cleaned`` is True. They are not
+    modified. ``log`` is an optional callable receiving progress messages;
+    stage timings are recorded on ``profiler`` when one is given.
+    """
+    log = log or _noop
+
+    if not cleaned:
+        log("Cleaning data...")
+        dump = clean_dump(dump)
+        pillar = clean_pillar(pillar)
+        owner_map = clean_owner_map(owner_map)
+        attendance = clean_attendance(attendance)
+
+    frames = {
+        "dump": dump,
+        "pillar": pillar,
+        "owner_map": owner_map,
+        "attendance": attendance,
+    }
+    pivot, _ = run_stages(frames, log=log, profiler=profiler)
+    return pivot
+
+
+# =========================
+# CHUNKED RECONCILIATION
+# =========================
+PILLAR_CHUNK_ROWS = 250_000
+
+
+def iter_pillar_chunks(pillar_file, chunk_rows=PILLAR_CHUNK_ROWS):
+    """Stream the raw pillar upload in batches of ``chunk_rows`` rows."""
+    return iter_file_chunks(pillar_file, chunk_rows=chunk_rows, **INPUT_READ_ARGS["pillar"])
+
+
+def enrich_pillar(pillar, dump_first, owner_map, attendance, hub_zone=None):
+    """Run the row-level stages, invoice period through owner, on cleaned pillar rows."""
+    pillar = attach_invoice_period(pillar, dump_first)
+    pillar = attach_attendance(pillar, attendance)
+    pillar = attach_hub_zone(pillar, hub_zone)
+    return attach_owner(pillar, owner_map)
+
+
+def combine_partial_sums(partials):
+    """
+    Concatenate ``sum_by_pivot_keys`` results and sum them per group again.
+
+    Categorical key columns are unioned with sorted categories, so the
+    combined groups come out in the same order as a single-pass groupby.
+    """
+    columns = {}
+    for col in partials[0].columns:
+        parts = [p[col] for p in partials]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            # A chunk where the key is all missing has empty, untyped categories.
+            typed = [p.cat.categories for p in parts if len(p.cat.categories)]
+            if typed:
+                parts = [p if len(p.cat.categories) else p.cat.set_categories(typed[0][:0]) for p in parts]
+            try:
+                combined = union_categoricals(parts, sort_categories=True)
+            except TypeError:
+                combined = union_categoricals(parts)
+            columns[col] = pd.Series(combined)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return sum_by_pivot_keys(pd.DataFrame(columns))
+
+
+def reconcile_chunked(dump, pillar_chunks, owner_map, attendance, log=None, cleaned=False, profiler=None):
+    """
+    Low-memory variant of ``reconcile`` for pillar files larger than RAM.
+
+    ``pillar_chunks`` is an iterable of raw pillar frames, normally
+    ``iter_pillar_chunks(file)``; the other three frames are small and are
+    passed whole, raw or (with ``cleaned``) from ``load_clean_inputs``.
+    Each chunk is cleaned, enriched against the lookups and summed per
+    pivot group on its own; the partial sums are folded together whenever
+    they outgrow the last folded result. Peak memory therefore follows one
+    chunk plus the number of distinct groups, not the pillar's row count.
+    The returned pivot has the same rows, order and columns as
+    ``reconcile``.
+    """
+    log = log or _noop
+    profiler = profiler or Profiler()
+
+    if not cleaned:
+        log("Cleaning data...")
+        dump = clean_dump(dump)
+        owner_map = clean_owner_map(owner_map)
+        attendance = clean_attendance(attendance)
+
+    with profiler.stage("dump_first", rows_in=dump) as record:
+        dump_first = first_invoice_per_order(dump)
+        record["rows_out"] = dump_first
+
+    log("Processing pillar in chunks...")
+    hub_zone = hub_zone_table()
+    partials = []
+    pending_rows = 0
+    folded_rows = 0
+    with profiler.stage("pillar_chunks", rows_in=0) as record:
+        for chunk in pillar_chunks:
+            record["rows_in"] += len(chunk)
+            partial = sum_by_pivot_keys(enrich_pillar(clean_pillar(chunk), dump_first, owner_map, attendance, hub_zone))
+            partials.append(partial)
+            pending_rows += len(partial)
+            # Fold once the unfolded partials outgrow the folded result, so
+            # each group is re-summed O(log chunks) times.
+            if len(partials) > 1 and pending_rows - folded_rows > folded_rows:
+                partials = [combine_partial_sums(partials)]
+                folded_rows = pending_rows = len(partials[0])
+            log(f"Processed {record['rows_in']:,} pillar rows")
+        record["rows_out"] = pending_rows
+
+    if not partials:
+        raise ValueError("The pillar file produced no data")
+
+    log("Creating pivot...")
+    with profiler.stage("pivot", rows_in=pending_rows) as record:
+        sums = partials[0] if len(partials) == 1 else combine_partial_sums(partials)
+        pivot = pivot_layout(sums)
+        record["rows_out"] = pivot
+
+    with profiler.stage("adjustments", rows_in=pivot) as record:
+        pivot = apply_adjustments(pivot)
+        record["rows_out"] = pivot
+    return pivot
+
+
+def inter_assignment_adjustment(pivot):
+    """
+    Auto-adjust equal and opposite variances within the same Order.
+
+    Returns the "Inter assignment adjustment" column aligned to ``pivot``.
+
+    Rows are keyed on (Order No, variance rounded to 6 places). Scanning an
+    Order's rows of one magnitude in pivot order, an entry pairs with the
+    entry immediately before it when that one is still open and has the
+    opposite sign; a repeated sign replaces the open entry. Within each run
+    of alternating signs that pairs positions (0, 1), (2, 3), ... so the
+    matching is a sort plus cumulative counts instead of a row loop.
+    """
+    var = pd.to_numeric(pivot["Var. Performed Vs. Billed"], errors="coerce").to_numpy(dtype="float64")
+    adjustment = pd.Series(pd.NA, index=pivot.index, dtype="object")
+
+    rows = np.flatnonzero(~np.isnan(var) & (var != 0))
+    if len(rows) == 0:
+        return adjustment
+
+    val = var[rows]
+    # Python's round (correctly rounded), not np.round (scale, round, unscale),
+    # which disagrees on values near a half-way point; once per distinct value.
+    distinct_codes, distinct = pd.factorize(np.abs(val))
+    magnitude = np.array([round(v, 6) for v in distinct.tolist()], dtype="float64")[distinct_codes]
+    # A variance that rounds to zero matches the next one regardless of sign.
+    sign = np.where(magnitude == 0, 0, np.sign(val))
+
+    order_codes, _ = pd.factorize(pivot["Order No"].astype(str).str.strip().to_numpy()[rows], use_na_sentinel=False)
+    magnitude_codes, _ = pd.factorize(magnitude)
+
+    # Stable: rows keep pivot order inside each (Order, magnitude) group.
+    ordering = np.lexsort((magnitude_codes, order_codes))
+    order_codes = order_codes[ordering]
+    magnitude_codes = magnitude_codes[ordering]
+    sign = sign[ordering]
+
+    new_group = np.ones(len(ordering), dtype=bool)
+    new_group[1:] = (order_codes[1:] != order_codes[:-1]) | (magnitude_codes[1:] != magnitude_codes[:-1])
+
+    new_run = new_group.copy()
+    new_run[1:] |= (sign[1:] == sign[:-1]) & (sign[1:] != 0)
+
+    run_id = np.cumsum(new_run) - 1
+    run_start = np.flatnonzero(new_run)
+    run_length = np.diff(np.append(run_start, len(ordering)))
+
+    position = np.arange(len(ordering)) - run_start[run_id]
+    matched = (position % 2 == 1) | (position + 1 < run_length[run_id])
+
+    matched_rows = rows[ordering[matched]]
+    adjustment.iloc[matched_rows] = -var[matched_rows]
+
+    return adjustment
@@ -0,0 +1,92 @@
+"""
+Reference tables loaded from editable files.
+
+Static mappings such as HUB/Zone used to be list literals that every run
+turned into a DataFrame, normalized and merged on again. They now live in
+CSV files under reference/ that can be edited (and reviewed in version
+control) without touching the code. ``load_reference`` reads a file once
+per process into a ``ReferenceTable``: the key column is normalized once
+and held as a ``pd.Index`` whose hash table is built once, the value
+columns as categoricals, so enriching rows is one index lookup over their
+distinct keys.
+
+Each access checks the file's modification time and size and reloads it
+when it has changed, so an edit is picked up by the next run without a
+restart. ``ReferenceTable.version`` is the file's content digest; the
+pipeline includes it in its stage memo keys so results computed with an
+older mapping are not reused.
+"""
+import os
+import threading
+
+import pandas as pd
+
+from cache import file_digest
+from keys import intern, lookup_positions, take
+
+
+class ReferenceTable:
+    """A reference file indexed on its (normalized, unique) key column."""
+
+    def __init__(self, frame, key, version):
+        self.frame = frame
+        self.key = key
+        self.version = version
+        self.index = pd.Index(frame[key])
+        self._values = {col: intern(frame[col]) for col in frame.columns if col != key}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def positions(self, keys):
+        """Row position of each of ``keys`` in the table (-1 where missing)."""
+        return lookup_positions(self.index, keys)
+
+    def lookup(self, keys, columns):
+        """``{column: values}`` for ``keys``, missing where a key is not in the table."""
+        positions = self.positions(keys)
+        return {col: take(self._values[col], positions) for col in columns}
+
+
+def read_reference(path, key, normalize=None):
+    """
+    Read a reference CSV into a ``ReferenceTable`` keyed on ``key``.
+
+    All columns are read as stripped strings and ``normalize`` (a Series ->
+    Series function) is applied to the key column. Raises ValueError if the
+    key column is missing or not unique after normalization.
+    """
+    with open(path, "rb") as f:
+        version = file_digest(f)
+        frame = pd.read_csv(f, dtype=str, keep_default_na=False, skipinitialspace=True)
+    frame.columns = frame.columns.str.strip()
+    if key not in frame.columns:
+        raise ValueError(f"{path}: missing key column '{key}'")
+
+    frame = frame.apply(lambda col: col.str.strip())
+    if normalize is not None:
+        frame[key] = normalize(frame[key])
+    duplicates = frame.loc[frame[key].duplicated(), key].unique()
+    if len(duplicates):
+        raise ValueError(f"{path}: duplicate {key} values: {', '.join(duplicates)}")
+    return ReferenceTable(frame, key, version)
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def load_reference(path, key, normalize=None):
+    """
+    The ``ReferenceTable`` for ``path``, read once and reloaded when the file
+    changes on disk. Safe to call from concurrent jobs.
+    """
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cache_id = (os.path.abspath(path), key, normalize)
+    with _tables_lock:
+        cached = _tables.get(cache_id)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, read_reference(path, key, normalize))
+            _tables[cache_id] = cached
+        return cached[1]
@@ -0,0 +1,201 @@
+"""
+Excel output for the reconciled pivot.
+
+The workbook is written with xlsxwriter's ``constant_memory`` mode straight
+to a file: each row is flushed to disk as soon as it is written, rows are
+converted in fixed-size blocks, and the per-HUB sheets are written from
+row positions computed in a single groupby instead of one boolean mask per
+HUB. Peak memory therefore stays close to the size of the pivot itself.
+
+``write_outputs`` writes the same pivot in any of ``OUTPUT_FORMATS``: the
+workbook above, a zip of one workbook per HUB rendered in parallel worker
+processes, or Parquet / CSV for consumers that do not need Excel.
+"""
+import multiprocessing
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import xlsxwriter
+
+
+REPORT_FILE_NAME = "Hours_Recon_Output.xlsx"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+BLOCK_ROWS = 10_000
+
+# Same look as pandas' to_excel output.
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+
+def _block_rows(block):
+    """Yield the rows of ``block`` as lists of Python values, blanks as None."""
+    columns = []
+    for _, col in block.items():
+        values = col.to_numpy(dtype=object, copy=True)
+        values[col.isna().to_numpy()] = None
+        columns.append(values)
+    return zip(*columns)
+
+
+def _write_sheet(workbook, name, frame, positions=None, block_rows=BLOCK_ROWS):
+    """Write ``frame`` (or only the rows at ``positions``) to a new sheet."""
+    worksheet = workbook.add_worksheet(name)
+    header_format = workbook.add_format(HEADER_FORMAT)
+    worksheet.write_row(0, 0, [str(c) for c in frame.columns], header_format)
+
+    total = len(frame) if positions is None else len(positions)
+    row = 1
+    for start in range(0, total, block_rows):
+        if positions is None:
+            block = frame.iloc[start:start + block_rows]
+        else:
+            block = frame.iloc[positions[start:start + block_rows]]
+        for values in _block_rows(block):
+            worksheet.write_row(row, 0, values)
+            row += 1
+
+
+def hub_positions(india_conso):
+    """Map each HUB, in order of first appearance, to its row positions."""
+    hubs = india_conso["HUB"]
+    indices = india_conso.groupby(hubs, sort=False, dropna=True).indices
+    return {hub: indices[hub] for hub in pd.unique(hubs.dropna())}
+
+
+def _write_workbook(target, sheets, block_rows=BLOCK_ROWS):
+    """Write ``(sheet name, frame)`` pairs to one workbook."""
+    workbook = xlsxwriter.Workbook(target, {
+        "constant_memory": True,
+        "default_date_format": DATETIME_FORMAT,
+    })
+    try:
+        for name, frame in sheets:
+            _write_sheet(workbook, name, frame, block_rows=block_rows)
+    finally:
+        workbook.close()
+
+
+def write_report(india_conso, target, block_rows=BLOCK_ROWS):
+    """
+    Write the India Conso sheet plus one sheet per HUB.
+
+    ``target`` is a file path or a binary file object. Only a path gets the
+    full benefit of ``constant_memory``; xlsxwriter keeps everything in
+    memory for file objects.
+    """
+    workbook = xlsxwriter.Workbook(target, {
+        "constant_memory": True,
+        "default_date_format": DATETIME_FORMAT,
+    })
+    try:
+        _write_sheet(workbook, "India Conso", india_conso, block_rows=block_rows)
+
+        for hub, positions in hub_positions(india_conso).items():
+            _write_sheet(workbook, str(hub)[:31], india_conso, positions, block_rows=block_rows)
+    finally:
+        workbook.close()
+
+
+# =========================
+# MULTI-FILE AND FAST EXPORTS
+# =========================
+# format -> (file name, MIME type)
+OUTPUT_FORMATS = {
+    "xlsx": (REPORT_FILE_NAME, XLSX_MIME),
+    "zip": ("Hours_Recon_Output.zip", "application/zip"),
+    "parquet": ("Hours_Recon_Output.parquet", "application/vnd.apache.parquet"),
+    "csv": ("Hours_Recon_Output.csv", "text/csv"),
+}
+
+
+def _hub_file_name(hub):
+    return "HUB_" + (re.sub(r"[^A-Za-z0-9_-]+", "_", str(hub)).strip("_") or "blank") + ".xlsx"
+
+
+def write_report_zip(india_conso, target, workers=None):
+    """
+    Write a zip holding the India Conso workbook plus one workbook per HUB.
+
+    Each workbook is rendered by its own task in a pool of ``workers``
+    processes (default: one per CPU, at most one per workbook), since
+    xlsxwriter is pure Python and a single workbook cannot be written from
+    several processes. With one worker everything is written in-process.
+    """
+    tasks = [(REPORT_FILE_NAME, [("India Conso", india_conso)])]
+    for hub, positions in hub_positions(india_conso).items():
+        tasks.append((_hub_file_name(hub), [(str(hub)[:31], india_conso.iloc[positions])]))
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    with tempfile.TemporaryDirectory(prefix="hours_recon_zip_") as tmp:
+        paths = [os.path.join(tmp, name) for name, _ in tasks]
+        if workers == 1:
+            for path, (_, sheets) in zip(paths, tasks):
+                _write_workbook(path, sheets)
+        else:
+            # spawn: forking a process that runs Streamlit and Arrow threads is unsafe.
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(_write_workbook, path, sheets) for path, (_, sheets) in zip(paths, tasks)]
+                for future in futures:
+                    future.result()
+
+        # .xlsx files are already deflated; store them as they are.
+        with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_STORED) as archive:
+            for path, (name, _) in zip(paths, tasks):
+                archive.write(path, name)
+
+
+def export_frame(india_conso):
+    """
+    The pivot with column types Parquet/CSV consumers can rely on.
+
+    "Office Duty/Office Patrolling" mixes hours with "" for other customers;
+    the blanks become missing values so the column is numeric.
+    """
+    return india_conso.assign(**{
+        "Office Duty/Office Patrolling": pd.to_numeric(
+            india_conso["Office Duty/Office Patrolling"], errors="coerce"
+        ),
+    })
+
+
+def write_parquet(india_conso, target):
+    export_frame(india_conso).to_parquet(target, index=False)
+
+
+def write_csv(india_conso, target):
+    export_frame(india_conso).to_csv(target, index=False, date_format="%Y-%m-%d %H:%M:%S")
+
+
+WRITERS = {
+    "xlsx": write_report,
+    "zip": write_report_zip,
+    "parquet": write_parquet,
+    "csv": write_csv,
+}
+
+
+def write_outputs(india_conso, formats, directory, profiler=None):
+    """
+    Write ``india_conso`` in each of ``formats`` to ``directory``.
+
+    Files are named after ``OUTPUT_FORMATS``. Each format is timed as a
+    "write:<format>" stage on ``profiler`` (a ``profiling.Profiler``) when
+    one is given. Returns ``{format: path}``.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for fmt in formats:
+        path = os.path.join(directory, OUTPUT_FORMATS[fmt][0])
+        if profiler is None:
+            WRITERS[fmt](india_conso, path)
+        else:
+            with profiler.stage(f"write:{fmt}", rows_in=india_conso) as record:
+                WRITERS[fmt](india_conso, path)
+                record["rows_out"] = len(india_conso)
+        paths[fmt] = path
+    return paths
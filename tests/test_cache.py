@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache
+import recon
+from cache import FrameCache, cache_key, frame_nbytes
+from synth import generate
+
+
+def _frame(rows, value=0.0):
+    return pd.DataFrame({"x": np.full(rows, value)})
+
+
+def test_memory_tier_evicts_least_recently_used_by_size():
+    a, b, c = _frame(100), _frame(100, 1.0), _frame(100, 2.0)
+    memo = FrameCache(max_memory_bytes=2 * frame_nbytes(a), disk_dir=None)
+    memo.put("a", a)
+    memo.put("b", b)
+    assert memo.get("a") is a  # b is now the oldest
+    memo.put("c", c)
+    assert memo.get("b") is None
+    assert memo.get("a") is a and memo.get("c") is c
+    assert memo.memory_bytes == 2 * frame_nbytes(a)
+
+    memo.put("big", _frame(1000))  # larger than the whole tier: not kept
+    assert memo.get("big") is None
+    assert memo.get("a") is a and memo.get("c") is c
+
+
+def _pivot(paths, memo):
+    files = [open(paths[role], "rb") for role in ["dump", "pillar", "owner_map", "attendance"]]
+    try:
+        pivot, _ = recon.run_stages(recon.load_clean_inputs(*files, cache=memo))
+    finally:
+        for f in files:
+            f.close()
+    return pivot
+
+
+def test_disk_tier_reproduces_the_pivot(tmp_path):
+    pytest.importorskip("pyarrow")
+    paths = generate(str(tmp_path / "inputs"), 300, fmt="csv")
+    disk_dir = str(tmp_path / "cache")
+    pivot = _pivot(paths, FrameCache(disk_dir=disk_dir))
+
+    # A new process: empty memory, same disk.
+    memo = FrameCache(disk_dir=disk_dir)
+    reused = _pivot(paths, memo)
+    assert memo.hits["disk"] > 0 and memo.misses < 4
+    pd.testing.assert_frame_equal(reused, pivot)
+
+
+def test_frames_parquet_cannot_store_stay_in_memory(tmp_path):
+    pytest.importorskip("pyarrow")
+    mixed = pd.DataFrame({"x": [1, "a"]}, dtype=object)
+    memo = FrameCache(disk_dir=str(tmp_path))
+    memo.put("mixed", mixed)
+    assert os.listdir(tmp_path) == []
+    assert memo.get("mixed") is mixed
+    assert FrameCache(disk_dir=str(tmp_path)).get("mixed") is None
+
+
+def test_disk_tier_prunes_least_recently_used_files(tmp_path):
+    pytest.importorskip("pyarrow")
+    memo = FrameCache(disk_dir=str(tmp_path))
+    for i, key in enumerate(["old", "used", "new"]):
+        memo.put(key, _frame(1000, i))
+        os.utime(tmp_path / f"{key}.parquet", (i, i))
+    size = os.path.getsize(tmp_path / "new.parquet")
+    FrameCache(disk_dir=str(tmp_path)).get("used")  # a disk hit marks it recently used
+
+    memo.max_disk_bytes = 2 * size
+    memo._prune_disk()
+    assert sorted(os.listdir(tmp_path)) == ["new.parquet", "used.parquet"]
+
+
+def test_cache_version_is_part_of_the_key(monkeypatch):
+    key = cache_key("digest", role="pillar")
+    assert cache_key("digest", role="pillar") == key
+    assert cache_key("digest", role="dump") != key
+    monkeypatch.setattr(cache, "CACHE_VERSION", cache.CACHE_VERSION + "-next")
+    assert cache_key("digest", role="pillar") != key
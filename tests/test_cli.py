@@ -0,0 +1,80 @@
+import os
+
+import pandas as pd
+
+import cli
+from synth import FILE_NAMES, make_inputs, write_input
+
+
+def _write(folder, inputs, roles):
+    os.makedirs(folder, exist_ok=True)
+    for role in roles:
+        write_input(inputs[role], os.path.join(folder, f"{FILE_NAMES[role]}.csv"), preamble=role != "owner_map")
+
+
+def _later_invoices(dump, days):
+    later = dump.copy()
+    for col in ["Period From", "Period To", "Invoice dt"]:
+        dates = pd.to_datetime(later[col], format="%d-%b-%Y", errors="coerce") + pd.Timedelta(days=days)
+        later[col] = dates.dt.strftime("%d-%b-%Y").fillna("")
+    return later
+
+
+def _output(out_dir, month):
+    return pd.read_parquet(os.path.join(out_dir, month, "Hours_Recon_Output.parquet"))
+
+
+def test_shared_dump_is_resolved_per_month(tmp_path):
+    inputs = make_inputs(200, seed=5)
+    others = ["pillar", "owner_map", "attendance"]
+
+    # One dump for March and June, shared by both month folders.
+    shared = tmp_path / "shared"
+    _write(shared, dict(inputs, dump=pd.concat([inputs["dump"], _later_invoices(inputs["dump"], 92)])), ["dump"])
+    for month in ["2024-03", "2024-06"]:
+        _write(shared / month, inputs, others)
+
+    # March with only its own invoices.
+    own = tmp_path / "own"
+    _write(own / "2024-03", inputs, ["dump"] + others)
+
+    assert cli.main([str(shared), "-o", str(tmp_path / "out_shared"), "--formats", "parquet"]) == 0
+    assert cli.main([str(own), "-o", str(tmp_path / "out_own"), "--formats", "parquet"]) == 0
+
+    march = _output(tmp_path / "out_shared", "2024-03")
+    pd.testing.assert_frame_equal(march, _output(tmp_path / "out_own", "2024-03"))
+    june = _output(tmp_path / "out_shared", "2024-06")
+    assert (pd.to_datetime(june["Period To"]).dt.month == 6).any()
+    assert not (pd.to_datetime(march["Period To"]).dt.month == 6).any()
+
+
+def test_month_files_override_shared_files(tmp_path):
+    inputs = make_inputs(20, seed=1)
+    _write(tmp_path, inputs, ["dump", "owner_map"])
+    _write(tmp_path / "2024-03", inputs, ["dump", "pillar", "attendance"])
+    _write(tmp_path / "2024-04", inputs, ["pillar"])
+
+    months = dict(cli.discover_months(str(tmp_path)))
+    assert list(months) == ["2024-03"]  # 2024-04 lacks attendance
+    assert months["2024-03"]["dump"] == str(tmp_path / "2024-03" / "dump.csv")
+    assert months["2024-03"]["owner"] == str(tmp_path / "owner_mapping.csv")
+    assert cli.shared_dump_period("2024-03", months["2024-03"], str(tmp_path)) is None
+
+
+def test_only_a_shared_dump_is_resolved_per_month(tmp_path):
+    inputs = make_inputs(20, seed=1)
+    _write(tmp_path / "own", inputs, ["pillar", "owner_map"])
+    _write(tmp_path / "own" / "2024-03", inputs, ["dump", "attendance"])
+    _write(tmp_path / "shared", inputs, ["dump"])
+    _write(tmp_path / "shared" / "2024-03", inputs, ["pillar", "owner_map", "attendance"])
+
+    for folder, period in [("own", None), ("shared", "2024-03")]:
+        input_dir = str(tmp_path / folder)
+        [(label, file_set)] = cli.discover_months(input_dir)
+        assert cli.shared_dump_period(label, file_set, input_dir) == period
+
+    # A single month folder has nothing shared.
+    input_dir = str(tmp_path / "own" / "2024-03")
+    _write(input_dir, inputs, ["pillar", "owner_map"])
+    [(label, file_set)] = cli.discover_months(input_dir)
+    assert label == "2024-03" and cli.shared_dump_period(label, file_set, input_dir) is None
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import recon
+from synth import make_inputs
+
+pytest.importorskip("duckdb")
+
+from bench_backends import parity_error  # noqa: E402
+from duckdb_backend import run_duckdb  # noqa: E402
+
+
+def _clean(inputs):
+    return {role: recon.CLEANERS[role](df) for role, df in inputs.items()}
+
+
+def _edge_inputs():
+    inputs = make_inputs(300, seed=4)
+    pillar = inputs["pillar"].copy()
+    # Missing keys.
+    pillar.loc[pillar.index[::11], "Order No"] = np.nan
+    pillar.loc[pillar.index[1::13], "Customer Code"] = np.nan
+    pillar.loc[pillar.index[2::17], "Location"] = np.nan
+    pillar.loc[pillar.index[3::19], "SO Line No"] = np.nan
+    # Locations in neither the HUB/Zone table nor the owner mapping.
+    pillar.loc[pillar.index[4::23], "Location"] = "NOWHERE"
+
+    attendance = inputs["attendance"].copy()
+    date_cols = [c for c in attendance.columns if c not in ("Row Labels", "Grand Total")]
+    # A date range written twice ("01 Mar - 31 Mar" and "1 Mar - 31 Mar")...
+    first = date_cols[0]
+    attendance.insert(2, first.replace("0", "", 1), attendance[first] + 1)
+    # ... text where hours belong (in the range most pillar rows use) ...
+    text_col = next(c for c in date_cols if recon.normalize_attendance_col(c) == "1-31")
+    attendance[text_col] = attendance[text_col].astype(object)
+    attendance.loc[attendance.index[::5], text_col] = "n/a"
+    # ... and repeated row labels.
+    attendance = pd.concat([attendance, attendance.iloc[: len(attendance) // 4]], ignore_index=True)
+
+    return dict(inputs, pillar=pillar, attendance=attendance)
+
+
+@pytest.mark.parametrize("inputs", [make_inputs(300, seed=4), _edge_inputs()], ids=["plain", "edge"])
+def test_duckdb_matches_pandas(inputs):
+    frames = _clean(inputs)
+    reference, _ = recon.run_stages(frames)
+    candidate, _ = run_duckdb(frames, threads=1)
+    assert parity_error(reference, candidate) is None
+
+
+def test_non_numeric_attendance_is_ignored():
+    raw = _edge_inputs()["attendance"]
+    attendance = _clean({"attendance": raw})["attendance"]
+    for i, col in enumerate(attendance.columns):
+        if recon.DATE_RANGE_COL.fullmatch(str(col)):
+            expected = pd.to_numeric(raw.iloc[:, i].replace("n/a", np.nan))
+            np.testing.assert_array_equal(
+                attendance.iloc[:, i].to_numpy(dtype="float64"), expected.to_numpy(dtype="float64")
+            )
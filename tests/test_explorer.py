@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import recon
+from explorer import MEASURES, PivotExplorer
+from synth import make_inputs
+
+
+@pytest.fixture(scope="module")
+def pivot():
+    inputs = make_inputs(400, seed=5)
+    return recon.reconcile(inputs["dump"], inputs["pillar"], inputs["owner_map"], inputs["attendance"])
+
+
+def _expected(pivot, by):
+    frame = pivot[by].copy()
+    for m in MEASURES:
+        frame[m] = pd.to_numeric(pivot[m], errors="coerce").fillna(0).astype(float)
+    grouped = frame.groupby(by, dropna=False, observed=True)
+    expected = grouped[MEASURES].sum()
+    expected["Rows"] = grouped.size()
+    return expected.reset_index()
+
+
+@pytest.mark.parametrize("by", [["Zone"], ["Owner"], ["HUB", "Location"], ["Zone", "Owner"], ["Order No", "Invoice No"]])
+def test_rollup_matches_groupby(pivot, by):
+    result = PivotExplorer(pivot).rollup(by)
+    expected = _expected(pivot, by)
+    for frame in (result, expected):
+        for dim in by:
+            frame[dim] = frame[dim].astype(object).where(frame[dim].notna(), None)
+    result = result.sort_values(by, ignore_index=True, key=lambda s: s.astype(str))
+    expected = expected.sort_values(by, ignore_index=True, key=lambda s: s.astype(str))
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_filtered_rows_are_paged_and_sorted(pivot):
+    explorer = PivotExplorer(pivot)
+    owner = explorer.values("Owner")[0]
+    expected = pivot[pivot["Owner"] == owner].sort_values(
+        "Var. Performed Vs. Billed", ascending=False, kind="stable"
+    )
+    page, total = explorer.rows({"Owner": owner}, "Var. Performed Vs. Billed", False, number=1, page_size=5)
+    assert total == len(expected)
+    assert list(page.index) == list(expected.index[5:10])
+
+
+def test_all_missing_dimension(pivot):
+    explorer = PivotExplorer(pivot.assign(Owner=np.nan))
+    result = explorer.rollup("Owner")
+    assert len(result) == 1 and result["Owner"].isna().all()
+    assert explorer.rows({"Owner": None})[1] == len(pivot)
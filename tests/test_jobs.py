@@ -0,0 +1,81 @@
+import threading
+import time
+
+import jobs
+from jobs import JobManager
+
+
+def _finished(manager, result="ok"):
+    job = manager.submit(lambda job: result)
+    while not (job.done and job.finished_at):
+        time.sleep(0.01)
+    return job
+
+
+def test_discarded_job_is_forgotten():
+    manager = JobManager(max_workers=1)
+    job = _finished(manager)
+    assert manager.get(job.id) is job
+    manager.discard(job.id)
+    assert manager.get(job.id) is None
+    manager.discard(job.id)  # already gone: no error
+
+
+def test_finished_jobs_expire_unless_looked_at():
+    manager = JobManager(max_workers=1)
+    old, watched, fresh = _finished(manager), _finished(manager), _finished(manager)
+    long_ago = time.time() - 2 * jobs.FINISHED_JOB_SECONDS
+    old.finished_at = old.seen_at = long_ago
+    watched.finished_at = long_ago
+
+    assert manager.get(old.id) is None
+    assert manager.get(watched.id) is watched
+    assert manager.get(fresh.id) is fresh
+
+
+def test_finished_jobs_are_capped(monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_FINISHED_JOBS", 2)
+    manager = JobManager(max_workers=1)
+    first = [_finished(manager) for _ in range(3)]
+    last = _finished(manager)
+    assert manager.get(first[0].id) is None
+    assert manager.get(last.id) is last
+
+
+def _with_cleanup(cleaned, started=None, release=None):
+    def run(job):
+        job.add_cleanup(lambda: cleaned.append(job.id))
+        if started is not None:
+            started.set()
+            release.wait(5)
+        return "ok"
+    return run
+
+
+def test_cleanups_run_when_a_finished_job_is_dropped(monkeypatch):
+    manager = JobManager(max_workers=1)
+    cleaned = []
+    capped, expired, discarded, kept = (manager.submit(_with_cleanup(cleaned)) for _ in range(4))
+    while not all(job.done and job.finished_at for job in (capped, expired, discarded, kept)):
+        time.sleep(0.01)
+    assert cleaned == []
+
+    monkeypatch.setattr(jobs, "MAX_FINISHED_JOBS", 1)
+    expired.finished_at = expired.seen_at = time.time() - 2 * jobs.FINISHED_JOB_SECONDS
+    manager.discard(discarded.id)
+    assert manager.get(kept.id) is kept
+    assert sorted(cleaned) == sorted([capped.id, expired.id, discarded.id])
+
+
+def test_cleanups_of_a_discarded_running_job_run_when_it_finishes():
+    manager = JobManager(max_workers=1)
+    cleaned, started, release = [], threading.Event(), threading.Event()
+    job = manager.submit(_with_cleanup(cleaned, started, release))
+    started.wait(5)
+    manager.discard(job.id)
+    assert job.discarded and cleaned == []
+    release.set()
+    deadline = time.time() + 5
+    while not cleaned and time.time() < deadline:
+        time.sleep(0.01)
+    assert cleaned == [job.id]
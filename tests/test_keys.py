@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import recon
+from keys import intern, intern_combined
+from synth import make_inputs
+
+
+@pytest.fixture(scope="module")
+def inputs():
+    return make_inputs(120, seed=3)
+
+
+def test_intern_all_missing():
+    s = intern(pd.Series([np.nan, None]), recon.normalize_order)
+    assert isinstance(s.dtype, pd.CategoricalDtype)
+    assert len(s.cat.categories) == 0
+    assert s.isna().all()
+
+
+def test_intern_combined_with_all_missing_column():
+    location = intern(pd.Series(["A", "B"]), recon.normalize_order)
+    customer = intern(pd.Series([np.nan, np.nan]), recon.normalize_code)
+    location.name, customer.name = "Location", "Customer Code"
+    key = intern_combined([location, customer], lambda u: u["Location"] + "_" + u["Customer Code"])
+    assert key.isna().all()
+
+
+@pytest.mark.parametrize("column", ["Customer Code", "Location", "Order No"])
+def test_reconcile_with_all_missing_key_column(inputs, column):
+    expected = recon.reconcile(inputs["dump"], inputs["pillar"], inputs["owner_map"], inputs["attendance"])
+    pillar = inputs["pillar"].assign(**{column: np.nan})
+    pivot = recon.reconcile(inputs["dump"], pillar, inputs["owner_map"], inputs["attendance"])
+    assert pivot[column].isna().all()
+    if column != "Order No":  # without an Order No there is no attendance to join
+        for col in ["Total Performed", "Total Billed"]:
+            assert pivot[col].sum() == pytest.approx(expected[col].sum())
+
+
+def test_one_row_chunks_match_reconcile(inputs):
+    pillar = inputs["pillar"].copy()
+    # A trailing totals row: every key blank.
+    pillar.loc[len(pillar)] = {c: np.nan for c in pillar.columns} | {"Performed Hrs": 5.0, "Billed Hrs": 5.0}
+    expected = recon.reconcile(inputs["dump"], pillar, inputs["owner_map"], inputs["attendance"])
+    chunks = (pillar.iloc[i:i + 1] for i in range(len(pillar)))
+    result = recon.reconcile_chunked(inputs["dump"], chunks, inputs["owner_map"], inputs["attendance"])
+    pd.testing.assert_frame_equal(expected, result)
+
+
+def test_first_invoice_per_order_without_period_days(inputs):
+    dump = recon.clean_dump(inputs["dump"]).assign(**{"Period From": pd.NaT})
+    dump_first = recon.first_invoice_per_order(dump)
+    assert dump_first["Date_Range"].isna().all()
+    assert dump_first["Order No"].is_unique
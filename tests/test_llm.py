@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+import llm
+from llm import SuggestionCache, SuggestionError, generate_fix_suggestion, generate_fix_suggestions, suggestion_key
+
+
+def _request(error_message="Pillar: column 'Order No' is missing", **overrides):
+    return dict({
+        "user_prompt": "Uploaded the pillar file",
+        "file_description": "Pillar.xlsx",
+        "expected_format": "Headers on row 3",
+        "error_message": error_message,
+    }, **overrides)
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    llm.SUGGESTION_CACHE.clear()
+    yield
+    llm.SUGGESTION_CACHE.clear()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Backend "fake" that records the error message of every request it answers."""
+    seen = []
+
+    def fake(inputs, timeout):
+        seen.append(inputs["error_message"])
+        return f"answer: {inputs['error_message']}"
+
+    monkeypatch.setitem(llm.BACKENDS, "fake", fake)
+    return seen
+
+
+def test_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm.time, "monotonic", lambda: now[0])
+    cache = SuggestionCache(ttl_seconds=60)
+    cache.put("k", "text")
+    now[0] += 60
+    assert cache.get("k") == "text"
+    now[0] += 1
+    assert cache.get("k") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SuggestionCache(max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # b is now the oldest
+    cache.put("c", "C")
+    assert [cache.get(k) for k in "abc"] == ["A", None, "C"]
+
+
+def test_suggestion_key_ignores_whitespace_only():
+    key = suggestion_key("stub", **_request())
+    assert suggestion_key("stub", **_request(error_message="  Pillar: column\n'Order No'   is missing ")) == key
+    assert suggestion_key("stub", **_request(error_message="Pillar: column 'order no' is missing")) != key
+    assert suggestion_key("openrouter", **_request()) != key
+
+
+def test_stub_backend_answers_offline():
+    text = generate_fix_suggestion(**_request("first problem\n\nsecond problem"), backend="stub")
+    assert "1. Correct this: first problem\n2. Correct this: second problem" in text
+    assert "Headers on row 3" in text
+
+
+def test_answers_are_cached_but_failures_are_not(calls, monkeypatch):
+    assert generate_fix_suggestion(**_request(), backend="fake") == generate_fix_suggestion(**_request(), backend="fake")
+    assert len(calls) == 1
+
+    def failing(inputs, timeout):
+        calls.append(inputs["error_message"])
+        raise SuggestionError("❌ Network error: down")
+
+    monkeypatch.setitem(llm.BACKENDS, "failing", failing)
+    assert generate_fix_suggestion(**_request(), backend="failing") == "❌ Network error: down"
+    generate_fix_suggestion(**_request(), backend="failing")
+    assert len(calls) == 3
+
+
+def test_batch_sends_identical_requests_once(calls):
+    batch = [_request("a"), _request("b"), _request(" a "), _request("b")]
+    answers = generate_fix_suggestions(batch, backend="fake")
+    assert len(calls) == 2
+    assert answers[0] == answers[2] and answers[1] == answers[3] == "answer: b"
+
+
+def test_batch_is_bounded_by_the_timeout(calls, monkeypatch):
+    release = threading.Event()
+
+    def slow(inputs, timeout):
+        if inputs["error_message"] == "slow":
+            release.wait(5)
+        return f"answer: {inputs['error_message']}"
+
+    monkeypatch.setitem(llm.BACKENDS, "slow", slow)
+    start = time.perf_counter()
+    try:
+        answers = generate_fix_suggestions([_request("fast"), _request("slow")], backend="slow", timeout=0.2)
+    finally:
+        release.set()
+    assert time.perf_counter() - start < 2
+    assert answers == ["answer: fast", llm.TIMEOUT_MESSAGE]
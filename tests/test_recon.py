@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import recon
+from keys import intern
+from synth import generate
+
+
+def _adjustment_loop(pivot):
+    """The original row loop behind ``inter_assignment_adjustment``."""
+    adjustment = pd.Series(pd.NA, index=pivot.index, dtype="object")
+    seen = {}
+    for idx, row in pivot.iterrows():
+        order = str(row["Order No"]).strip()
+        val = pd.to_numeric(row["Var. Performed Vs. Billed"], errors="coerce")
+        if pd.isna(val) or val == 0:
+            continue
+        key = (order, round(val, 6))
+        reverse_key = (order, round(-val, 6))
+        if reverse_key in seen:
+            prev_idx = seen[reverse_key]
+            adjustment.loc[idx] = -val
+            adjustment.loc[prev_idx] = -pivot.loc[prev_idx, "Var. Performed Vs. Billed"]
+            del seen[reverse_key]
+        else:
+            seen[key] = idx
+    return adjustment
+
+
+def _as_float(adjustment):
+    return pd.to_numeric(adjustment).to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _random_pivot(rng):
+    n = int(rng.integers(1, 30))
+    half_way = np.round(rng.uniform(0, 5, 3), 6) + 5e-7
+    magnitudes = np.concatenate([
+        rng.choice([1.5, 2.25, 8.0], 3),
+        half_way,                                     # half-way for 6 places
+        [round(v, 6) for v in half_way.tolist()],
+        rng.choice([1e-7, 4e-7, 5e-7, 6e-7], 2),     # near zero
+        rng.uniform(0, 10, 2),                        # unmatched
+    ])
+    var = rng.choice(magnitudes, n) * rng.choice([-1.0, 1.0], n)
+    var[rng.random(n) < 0.1] = np.nan
+    var[rng.random(n) < 0.05] = 0.0
+    return pd.DataFrame({
+        "Order No": rng.choice(["ORD1", "ORD2", " ORD1", "ORD3"], n),
+        "Var. Performed Vs. Billed": var,
+    })
+
+
+def test_inter_assignment_adjustment_matches_loop():
+    rng = np.random.default_rng(7)
+    for _ in range(1000):
+        pivot = _random_pivot(rng)
+        np.testing.assert_array_equal(
+            _as_float(recon.inter_assignment_adjustment(pivot)),
+            _as_float(_adjustment_loop(pivot)),
+        )
+
+
+@pytest.mark.parametrize("value", [3.0000005, 0.0000005, 2.4999995])
+def test_inter_assignment_adjustment_rounds_like_python(value):
+    # round() and np.round() disagree on these: pairing must follow round().
+    pivot = pd.DataFrame({
+        "Order No": ["A", "A"],
+        "Var. Performed Vs. Billed": [value, -round(value, 6)],
+    })
+    np.testing.assert_array_equal(
+        _as_float(recon.inter_assignment_adjustment(pivot)),
+        _as_float(_adjustment_loop(pivot)),
+    )
+
+
+def _first_invoice_sorted(dump):
+    """``first_invoice_per_order`` as sort_values + drop_duplicates."""
+    dump = dump.sort_values(recon.LATEST_INVOICE_ORDER, ascending=[False, False, False])
+    dump_first = dump.drop_duplicates(subset=["Order No"], keep="first").copy()
+    dump_first["Date_Range"] = (
+        dump_first["Period From"].dt.day.astype("Int64").astype(str)
+        + "-"
+        + dump_first["Period To"].dt.day.astype("Int64").astype(str)
+    )
+    return dump_first
+
+
+def _random_dump(rng):
+    n = int(rng.integers(1, 300))
+    # Few distinct days so equal dates (ties) are common.
+    dates = {
+        col: pd.Series(pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 6, n), unit="D"))
+        for col in recon.LATEST_INVOICE_ORDER
+    }
+    for s in dates.values():
+        s[rng.random(n) < 0.2] = pd.NaT
+    if rng.random() < 0.1:
+        dates["Period From"][:] = pd.NaT
+        dates["Period To"][:] = pd.NaT
+    order = pd.Series(rng.choice([f"ORD{i}" for i in range(60)], n), dtype=object)
+    order[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "Order No": intern(order, recon.normalize_order),
+        **dates,
+        "Row": np.arange(n),
+    })
+
+
+def test_first_invoice_per_order_matches_sort():
+    rng = np.random.default_rng(11)
+    for _ in range(300):  # about 10 000 orders
+        dump = _random_dump(rng)
+        result = recon.first_invoice_per_order(dump)
+        expected = _first_invoice_sorted(dump)
+        assert result["Row"].tolist() == expected["Row"].tolist()
+        pd.testing.assert_series_equal(
+            result["Date_Range"].astype(object),
+            expected["Date_Range"].astype(object),
+        )
+
+
+def test_office_duty_keeps_whole_hours_as_integers(tmp_path):
+    pivots = {}
+    for fmt in ["csv", "xlsx"]:
+        paths = generate(str(tmp_path / fmt), 300, fmt=fmt)
+        files = [open(paths[role], "rb") for role in ["dump", "pillar", "owner_map", "attendance"]]
+        try:
+            pivots[fmt], _ = recon.run_stages(recon.load_clean_inputs(*files))
+        finally:
+            for f in files:
+                f.close()
+    office_duty = pivots["xlsx"]["Office Duty/Office Patrolling"]
+    assert (office_duty != "").any()
+    assert not office_duty.str.endswith(".0").any()
+    assert office_duty.tolist() == pivots["csv"]["Office Duty/Office Patrolling"].tolist()
@@ -0,0 +1,89 @@
+import io
+import itertools
+
+import pandas as pd
+import pytest
+
+import ingest
+from ingest import read_head_rows, read_sample
+from synth import generate, make_inputs, write_input
+from validation import validate_inputs
+
+ROLES = ["dump", "pillar", "owner_map", "attendance"]
+
+
+def _open(paths):
+    return [open(paths[role], "rb") for role in ROLES]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def test_generated_inputs_validate(tmp_path, fmt):
+    files = _open(generate(str(tmp_path), 200, fmt=fmt))
+    report = validate_inputs(*files)
+    assert report.ok, report.summary()
+    assert all(f.tell() == 0 for f in files)
+
+
+def test_shifted_xlsx_header_is_found(tmp_path):
+    paths = generate(str(tmp_path), 200, fmt="xlsx")
+    pillar = make_inputs(200)["pillar"]
+    with pd.ExcelWriter(paths["pillar"], engine="xlsxwriter") as writer:
+        pillar.to_excel(writer, sheet_name="Sheet1", index=False, startrow=3)
+    report = validate_inputs(*_open(paths))
+    assert [i["problem"] for i in report.errors] == [
+        "the column headers are on row 4 but are expected on row 3; add or remove rows above the headers"
+    ]
+
+
+def test_xlsx_sample_reads_only_the_sample(tmp_path):
+    frame = pd.DataFrame([["a", 1, "x", 2.5]] * 50, columns=["Name", "Qty", None, "Qty"])
+    path = str(tmp_path / "sample.xlsx")
+    write_input(frame, path)
+    with open(path, "rb") as f:
+        sample = read_sample(f, header=2, rows=10)
+        assert len(read_head_rows(f, 4)) == 4
+    assert list(sample.columns) == ["Name", "Qty", "Unnamed: 2", "Qty.1"]
+    assert len(sample) == 10
+    assert sample["Qty.1"].tolist() == [2.5] * 10
+
+
+def test_shared_strings_are_read_like_openpyxl():
+    from openpyxl.reader.strings import read_string_table
+
+    ns = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    entries = [
+        "<si><t>plain</t></si>",
+        "<si><t xml:space=\"preserve\"> a &amp; b </t></si>",
+        "<si><r><rPr><b/></rPr><t>rich</t></r><r><t> text</t></r></si>",
+        "<si><t>kana</t><rPh sb=\"0\" eb=\"1\"><t>phonetic</t></rPh></si>",
+        "<si/>",
+        "<si><t>x005F_x000D_</t></si>",
+    ]
+    xml = f'<sst xmlns="{ns}" count="{len(entries)}">{"".join(entries)}</sst>'.encode()
+    prefixed = xml.replace(b"<", b"<x:").replace(b"<x:/", b"</x:").replace(b"xmlns=", b"xmlns:x=")
+    expected = read_string_table(io.BytesIO(xml))
+    for source in (xml, prefixed):
+        found = ingest._read_shared_strings(io.BytesIO(source), set(range(len(entries))), chunk_bytes=7)
+        assert [found[i] for i in range(len(entries))] == expected
+
+
+def test_xlsx_head_reads_only_the_strings_it_uses(tmp_path, monkeypatch):
+    from openpyxl import load_workbook
+
+    path = str(tmp_path / "pillar.xlsx")
+    write_input(make_inputs(3000, seed=2)["pillar"], path)
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    expected = [list(row) for row in itertools.islice(workbook.worksheets[0].iter_rows(values_only=True), 50)]
+    workbook.close()
+
+    # The head must not cost a read of the whole table, which grows with the file.
+    def whole_table(*args):
+        raise AssertionError("whole shared-string table read")
+
+    decoded = []
+    text = ingest._shared_string_text
+    monkeypatch.setattr("openpyxl.reader.excel.read_string_table", whole_table)
+    monkeypatch.setattr(ingest, "_shared_string_text", lambda *args: decoded.append(1) or text(*args))
+    with open(path, "rb") as f:
+        assert read_head_rows(f, 50) == expected
+    assert len(decoded) == len({v for row in expected for v in row if isinstance(v, str)})
@@ -0,0 +1,301 @@
+"""
+Fail-fast validation of the four uploads.
+
+A missing column, a header on the wrong row or unparseable dates used to
+surface as a ``KeyError`` deep inside the merges, after the full parse.
+``validate_inputs`` reads only the header and the first
+``VALIDATION_SAMPLE_ROWS`` rows of each file (``ingest.read_sample``, so a
+large file is not loaded) and checks them against what the pipeline
+expects:
+
+- the ``usecols`` lists in ``recon.INPUT_READ_ARGS``, the owner-mapping
+  columns, and attendance's "Row Labels" and date-range columns; when
+  columns are missing, the rows above and below are searched for the real
+  header row
+- dates (dump) and hours (pillar, attendance) parse in the sample
+- key columns are filled in and look like the keys they are joined on
+
+Every problem found goes into one ``ValidationReport``. Errors stop the run
+before the expensive parse; warnings are reported and the run continues.
+"""
+import re
+
+import pandas as pd
+
+from ingest import COLUMN_DTYPES, read_head_rows, read_sample
+from llm import generate_fix_suggestions
+from recon import (
+    DATE_RANGE_COL, DUMP_COLS, INPUT_READ_ARGS, PILLAR_COLS,
+    hub_zone_table, normalize_attendance_col, normalize_order,
+)
+
+
+VALIDATION_SAMPLE_ROWS = 1000
+
+# Rows searched for the real header when the expected columns are missing.
+HEADER_SEARCH_ROWS = 10
+
+FILE_LABELS = {
+    "dump": "Dump",
+    "pillar": "Pillar",
+    "owner_map": "Owner Mapping",
+    "attendance": "Attendance",
+}
+
+OWNER_MAP_COLS = ["billing_location", "cust_no", "branch_finance_lead"]
+DUMP_DATE_COLS = ["Period From", "Period To", "Invoice dt"]
+PILLAR_NUMERIC_COLS = [c for c in PILLAR_COLS if COLUMN_DTYPES.get(c) == "float64"]
+
+# Attendance row labels are "<Order No>-<SO Line No>".
+ROW_LABEL = re.compile(r".*\S.*-\s*\d+(\.0)?\s*")
+
+EXPECTED_FORMATS = {
+    "dump": f"Headers on row 3 (two rows above them are skipped), with columns: {', '.join(DUMP_COLS)}",
+    "pillar": f"Headers on row 3 (two rows above them are skipped), with columns: {', '.join(PILLAR_COLS)}",
+    "owner_map": "Headers on row 1, with columns: Billing Location, Cust No, Branch Finance Lead",
+    "attendance": (
+        "Pivot with headers on row 3: a 'Row Labels' column holding '<Order No>-<SO Line>' and one "
+        "column per billing period such as '01 Mar - 31 Mar' holding attendance totals"
+    ),
+}
+
+
+class ValidationReport:
+    """Problems found in the uploads, as ``(file, severity, column, problem)`` records."""
+
+    def __init__(self):
+        self.issues = []
+        self.files = {}
+
+    def add(self, role, severity, problem, column=None):
+        self.issues.append({
+            "file": FILE_LABELS[role],
+            "severity": severity,
+            "column": column,
+            "problem": problem,
+        })
+
+    @property
+    def errors(self):
+        return [i for i in self.issues if i["severity"] == "error"]
+
+    @property
+    def warnings(self):
+        return [i for i in self.issues if i["severity"] == "warning"]
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def table(self):
+        return pd.DataFrame(self.issues, columns=["file", "severity", "column", "problem"])
+
+    def summary(self, issues=None):
+        """One line per issue, e.g. "Dump (Period To): 12 of 1000 sampled values are not dates"."""
+        lines = []
+        for issue in self.issues if issues is None else issues:
+            where = issue["file"] + (f" ({issue['column']})" if issue["column"] else "")
+            lines.append(f"{where}: {issue['problem']}")
+        return "\n".join(lines)
+
+
+class ValidationError(ValueError):
+    """Raised with the ``ValidationReport`` when the uploads cannot be processed."""
+
+    def __init__(self, report):
+        self.report = report
+        super().__init__("The input files have problems:\n" + report.summary(report.errors))
+
+
+# =========================
+# COLUMN CHECKS
+# =========================
+def _find_header_row(file, required, normalize):
+    """Row (0-based) among the first HEADER_SEARCH_ROWS holding all ``required`` column names, or None."""
+    try:
+        rows = read_head_rows(file, HEADER_SEARCH_ROWS)
+    except Exception:
+        return None
+    for header, row in enumerate(rows):
+        if set(required) <= {normalize(c) for c in row if c is not None}:
+            return header
+    return None
+
+
+def _check_columns(report, role, file, sample, required, header, normalize=str):
+    """
+    Report missing ``required`` columns. Returns False when the header is
+    on another row, in which case the sample's contents are meaningless.
+    """
+    missing = [c for c in required if c not in sample.columns]
+    if not missing:
+        return True
+
+    actual = _find_header_row(file, required, normalize)
+    if actual is not None and actual != header:
+        report.add(
+            role, "error",
+            f"the column headers are on row {actual + 1} but are expected on row {header + 1}; "
+            "add or remove rows above the headers",
+        )
+        return False
+    report.add(role, "error", f"missing columns: {', '.join(missing)}")
+    return True
+
+
+def _blank(values):
+    return values.isna() | (values.astype(str).str.strip() == "")
+
+
+def _check_parses(report, role, col, values, parsed, what):
+    """Report sampled values of ``col`` that are filled in but did not parse."""
+    filled = ~_blank(values)
+    bad = filled & parsed.isna()
+    if not bad.any():
+        return
+    examples = ", ".join(repr(str(v)) for v in values[bad].unique()[:3])
+    if bad.sum() == filled.sum():
+        report.add(role, "error", f"none of the sampled values are {what} (e.g. {examples})", column=col)
+    else:
+        report.add(
+            role, "warning",
+            f"{bad.sum()} of {filled.sum()} sampled values are not {what} and will be ignored (e.g. {examples})",
+            column=col,
+        )
+
+
+def _check_filled(report, role, col, values):
+    blank = _blank(values)
+    if len(values) and blank.all():
+        report.add(role, "error", "the column is empty in the sampled rows", column=col)
+    elif blank.any():
+        report.add(role, "warning", f"{blank.sum()} of {len(values)} sampled rows are blank", column=col)
+
+
+# =========================
+# PER-FILE CHECKS
+# =========================
+# Each check looks at the columns that are present; missing ones have
+# already been reported.
+def _present(sample, columns):
+    return [c for c in columns if c in sample.columns]
+
+
+def _check_dump(report, sample):
+    for col in _present(sample, ["Order No"]):
+        _check_filled(report, "dump", col, sample[col])
+    for col in _present(sample, DUMP_DATE_COLS):
+        parsed = pd.to_datetime(sample[col], errors="coerce")
+        _check_parses(report, "dump", col, sample[col], parsed, "dates")
+
+
+def _check_pillar(report, sample):
+    for col in _present(sample, ["Order No", "Location", "Customer Code", "SO Line No"]):
+        _check_filled(report, "pillar", col, sample[col])
+    for col in _present(sample, PILLAR_NUMERIC_COLS):
+        _check_parses(report, "pillar", col, sample[col], pd.to_numeric(sample[col], errors="coerce"), "numbers")
+
+    if "Location" not in sample.columns:
+        return
+    locations = pd.Series(sample["Location"].dropna().unique())
+    if len(locations) and (hub_zone_table().positions(normalize_order(locations)) < 0).all():
+        report.add(
+            "pillar", "warning",
+            "none of the sampled locations are in the HUB/Zone mapping; HUB and Zone will be blank",
+            column="Location",
+        )
+
+
+def _owner_column(col):
+    # Same renaming as recon.clean_owner_map.
+    return str(col).strip().lower().replace(" ", "_")
+
+
+def _check_owner_map(report, sample):
+    for col in _present(sample, OWNER_MAP_COLS):
+        _check_filled(report, "owner_map", col, sample[col])
+
+
+def _check_attendance(report, sample):
+    if "Row Labels" in sample.columns:
+        _check_filled(report, "attendance", "Row Labels", sample["Row Labels"])
+        labels = sample["Row Labels"].dropna().astype(str)
+        if len(labels) and not labels.str.fullmatch(ROW_LABEL).any():
+            report.add(
+                "attendance", "error",
+                f"row labels should look like '<Order No>-<SO Line>' (found e.g. {labels.iloc[0]!r})",
+                column="Row Labels",
+            )
+
+    ranges = [c for c in sample.columns if isinstance(c, str) and DATE_RANGE_COL.fullmatch(normalize_attendance_col(c))]
+    if not ranges:
+        report.add("attendance", "error", "no billing-period columns such as '01 Mar - 31 Mar' were found")
+    for col in ranges:
+        _check_parses(report, "attendance", col, sample[col], pd.to_numeric(sample[col], errors="coerce"), "numbers")
+
+
+# role -> (required columns, column-name normalization, content checks)
+CHECKS = {
+    "dump": (DUMP_COLS, str, _check_dump),
+    "pillar": (PILLAR_COLS, str, _check_pillar),
+    "owner_map": (OWNER_MAP_COLS, _owner_column, _check_owner_map),
+    "attendance": (["Row Labels"], str, _check_attendance),
+}
+
+
+# =========================
+# PUBLIC API
+# =========================
+def validate_inputs(dump_file, pillar_file, owner_file, attendance_file, sample_rows=VALIDATION_SAMPLE_ROWS):
+    """
+    Check the four uploads from their headers and first ``sample_rows``
+    rows and return a ``ValidationReport``. Files passed as None are
+    skipped. Files are left rewound.
+    """
+    files = {
+        "dump": dump_file,
+        "pillar": pillar_file,
+        "owner_map": owner_file,
+        "attendance": attendance_file,
+    }
+    report = ValidationReport()
+    for role, f in files.items():
+        if f is None:
+            continue
+        required, normalize, check = CHECKS[role]
+        header = INPUT_READ_ARGS[role].get("header", 0)
+        try:
+            sample = read_sample(f, header, sample_rows)
+        except Exception as e:
+            report.add(role, "error", f"the file could not be read: {e}")
+            continue
+
+        report.files[role] = {"name": getattr(f, "name", role), "columns": [str(c) for c in sample.columns]}
+        sample = sample.rename(columns=normalize)
+        if _check_columns(report, role, f, sample, required, header, normalize):
+            check(report, sample)
+    return report
+
+
+def fix_suggestion(report):
+    """
+    Suggestions for fixing all of ``report``'s errors, asked for in one
+    batch: one request per file with errors, sent concurrently by
+    ``llm.generate_fix_suggestions``. Per-file requests keep the prompts
+    small and let a file's answer be reused from the cache whatever the
+    other files look like. Returns markdown with a section per file.
+    """
+    roles = [role for role, label in FILE_LABELS.items() if any(i["file"] == label for i in report.errors)]
+    batch = []
+    for role in roles:
+        info = report.files.get(role)
+        batch.append({
+            "user_prompt": f"Uploaded the {FILE_LABELS[role]} file to run the Hours Recon",
+            "file_description": (
+                f"{info['name']} (columns: {', '.join(info['columns'][:30])})" if info else "The file could not be read"
+            ),
+            "expected_format": EXPECTED_FORMATS[role],
+            "error_message": report.summary([i for i in report.errors if i["file"] == FILE_LABELS[role]]),
+        })
+    answers = generate_fix_suggestions(batch)
+    return "\n\n".join(f"**{FILE_LABELS[role]}**\n\n{answer}" for role, answer in zip(roles, answers))